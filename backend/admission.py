@@ -0,0 +1,298 @@
+"""Admission control and load shedding for the API.
+
+Two independent checks run before a request reaches its handler:
+
+* a per-client token bucket per route (429 + Retry-After when empty), backed by
+  a swappable ``RateLimitStore`` (in-memory by default);
+* bounded concurrency: every request takes a slot in a global pool, and
+  expensive routes also take a slot in their own pool. Waiters are served by
+  priority, so bookings overtake browsing traffic. A request that cannot get a
+  slot before its route's deadline, or that arrives to a full queue, is shed
+  with 503 + Retry-After instead of piling up.
+
+Every decision is counted and exposed through ``AdmissionController.metrics``.
+
+Clients are keyed by address. Behind an ingress or load balancer every
+request arrives from the proxy, so ``trusted_proxies`` must be set to the
+number of proxies that append to ``X-Forwarded-For``. The key is then the
+entry that many hops from the right, the address the outermost trusted proxy
+saw; entries further left are supplied by the client and ignored.
+"""
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from starlette.responses import JSONResponse
+
+# Lower value is served first
+PRIORITY_BOOKING = 0
+PRIORITY_BROWSE = 1
+
+
+class RateLimitStore:
+    """Token-bucket storage. Subclass to share buckets across workers (e.g. Redis)."""
+
+    async def consume(self, key: str, rate: float, burst: float) -> float:
+        """Take one token from ``key``'s bucket.
+
+        Returns 0 when the token was granted, otherwise the number of seconds
+        until one becomes available.
+        """
+        raise NotImplementedError
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    """Buckets in least recently used order; past ``max_keys`` the oldest goes."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def consume(self, key: str, rate: float, burst: float) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        granted = tokens >= 1
+        self._buckets[key] = (tokens - 1 if granted else tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return 0.0 if granted else (1 - tokens) / rate
+
+
+class Shed(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class PriorityLimiter:
+    """Concurrency limit whose waiters are admitted in priority order."""
+
+    def __init__(self, name: str, limit: int, max_queue: int):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.active = 0
+        self._waiters: List[list] = []
+        self._sequence = itertools.count()
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, waiter in self._waiters if not waiter.done())
+
+    async def acquire(self, priority: int, timeout: float) -> None:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+        if self.queued >= self.max_queue:
+            raise Shed(f"{self.name} queue full", timeout)
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, [priority, next(self._sequence), waiter])
+        try:
+            # A granted waiter inherits the releasing request's slot
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            raise Shed(f"{self.name} queue wait exceeded {timeout}s", timeout)
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+class RouteRule:
+    """Admission settings for requests matching ``method`` and ``path``.
+
+    ``path`` ending in ``*`` matches by prefix. ``concurrency`` of ``None``
+    means the route only shares the global pool. ``long_lived`` routes
+    (streams held open for minutes) are rate limited but never take a pool
+    slot, or a few idle listeners would starve every other route.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        method: str,
+        path: str,
+        rate: float,
+        burst: float,
+        priority: int = PRIORITY_BROWSE,
+        max_wait: float = 1.0,
+        concurrency: Optional[int] = None,
+        max_queue: int = 100,
+        long_lived: bool = False,
+    ):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.rate = rate
+        self.burst = burst
+        self.priority = priority
+        self.max_wait = max_wait
+        self.long_lived = long_lived
+        self.limiter = PriorityLimiter(name, concurrency, max_queue) if concurrency else None
+
+    def matches(self, method: str, path: str) -> bool:
+        if self.method != "*" and self.method != method:
+            return False
+        if self.path.endswith("*"):
+            return path.startswith(self.path[:-1])
+        return path == self.path
+
+
+def default_rules(live_rate: float = 1, live_burst: float = 10) -> List[RouteRule]:
+    return [
+        RouteRule("search", "POST", "/api/destinations/search",
+                  rate=5, burst=10, max_wait=0.5, concurrency=8, max_queue=32),
+        RouteRule("recommendations", "POST", "/api/recommendations",
+                  rate=0.2, burst=3, max_wait=2.0, concurrency=4, max_queue=8),
+        RouteRule("bookings", "*", "/api/bookings*",
+                  rate=2, burst=10, priority=PRIORITY_BOOKING, max_wait=5.0),
+        RouteRule("live", "GET", "/api/live/*", rate=live_rate, burst=live_burst, long_lived=True),
+        RouteRule("default", "*", "/api/*", rate=20, burst=40, max_wait=2.0),
+    ]
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        rules: Optional[List[RouteRule]] = None,
+        store: Optional[RateLimitStore] = None,
+        global_concurrency: int = 64,
+        global_max_queue: int = 256,
+        trusted_proxies: int = 0,
+    ):
+        self.rules = rules if rules is not None else default_rules()
+        self.store = store or InMemoryRateLimitStore()
+        self.global_limiter = PriorityLimiter("global", global_concurrency, global_max_queue)
+        self.trusted_proxies = trusted_proxies
+        self._counters: Dict[str, Dict[str, float]] = {}
+
+    def match(self, method: str, path: str) -> Optional[RouteRule]:
+        for rule in self.rules:
+            if rule.matches(method, path):
+                return rule
+        return None
+
+    def client_key(self, scope) -> str:
+        if self.trusted_proxies:
+            hops = [
+                hop.strip()
+                for name, value in scope.get("headers", []) if name == b"x-forwarded-for"
+                for hop in value.decode("latin-1").split(",") if hop.strip()
+            ]
+            # Fewer hops than trusted proxies: the request skipped a proxy
+            if len(hops) >= self.trusted_proxies:
+                return hops[-self.trusted_proxies]
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def _count(self, rule: RouteRule, outcome: str, wait: float = 0.0) -> None:
+        counters = self._counters.setdefault(rule.name, {
+            "admitted": 0, "rate_limited": 0, "shed": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0,
+        })
+        counters[outcome] += 1
+        if outcome == "admitted":
+            counters["wait_seconds_total"] += wait
+            counters["wait_seconds_max"] = max(counters["wait_seconds_max"], wait)
+
+    async def admit(self, rule: RouteRule, client: str, use_global: bool = True) -> List[PriorityLimiter]:
+        """Admit one request or raise ``Shed``; returns the limiters to release.
+
+        ``use_global=False`` skips the global pool, for work that runs inside a
+        request already holding a global slot (sub-requests of a batch).
+        """
+        retry_after = await self.store.consume(f"{rule.name}:{client}", rule.rate, rule.burst)
+        if retry_after:
+            self._count(rule, "rate_limited")
+            raise Shed("rate limited", retry_after)
+
+        started = time.monotonic()
+        deadline = started + rule.max_wait
+        held = []
+        if rule.long_lived:
+            limiters = ()
+        else:
+            limiters = (rule.limiter, self.global_limiter if use_global else None)
+        try:
+            for limiter in limiters:
+                if limiter is None:
+                    continue
+                await limiter.acquire(rule.priority, max(deadline - time.monotonic(), 0.0))
+                held.append(limiter)
+        except Shed:
+            for limiter in held:
+                limiter.release()
+            self._count(rule, "shed")
+            raise
+        self._count(rule, "admitted", time.monotonic() - started)
+        return held
+
+    def metrics(self) -> Dict:
+        limiters = [self.global_limiter] + [rule.limiter for rule in self.rules if rule.limiter]
+        return {
+            "routes": self._counters,
+            "limiters": {
+                limiter.name: {"limit": limiter.limit, "active": limiter.active, "queued": limiter.queued}
+                for limiter in limiters
+            },
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying an ``AdmissionController`` to HTTP requests.
+
+    WebSocket handshakes are matched as GET requests; a shed handshake is
+    closed before it is accepted, which the server answers with a 403.
+    """
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "websocket":
+            method = "GET"
+        elif scope["type"] == "http" and scope["method"] != "OPTIONS":
+            method = scope["method"]
+        else:
+            await self.app(scope, receive, send)
+            return
+        rule = self.controller.match(method, scope["path"])
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            held = await self.controller.admit(rule, self.controller.client_key(scope))
+        except Shed as shed:
+            if scope["type"] == "websocket":
+                await send({"type": "websocket.close", "code": 1008 if shed.reason == "rate limited" else 1013})
+                return
+            status_code = 429 if shed.reason == "rate limited" else 503
+            response = JSONResponse(
+                {"detail": "Too many requests" if status_code == 429 else "Server busy, retry later"},
+                status_code=status_code,
+                headers={"Retry-After": str(max(1, math.ceil(shed.retry_after)))},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            for limiter in held:
+                limiter.release()
@@ -0,0 +1,325 @@
+"""Booking analytics: revenue, occupancy, lead time and cancellation reporting.
+
+Grouping is pushed down into MongoDB aggregation pipelines wherever possible;
+the remaining per-row maths (interval clipping against hotel availability,
+lead-time quantiles) runs as vectorized pandas/NumPy over already-projected
+columns. Exports stream bookings in fixed-size chunks as Parquet or Arrow IPC
+so a full year of history never has to be materialised in memory.
+
+Bookings moved to the monthly archives by the lifecycle scheduler are
+included: pipelines ``$unionWith`` every archive month overlapping the
+requested range, so reports cover history the hot collection no longer holds.
+"""
+import io
+from datetime import date, datetime
+from typing import AsyncIterator, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from lifecycle import ARCHIVE_PREFIX, archive_name
+
+MS_PER_DAY = 86_400_000
+
+# Statuses that never turned into a stay
+UNREALISED_STATUSES = ["cancelled", "expired"]
+
+# Which booking field each revenue grouping maps onto
+REVENUE_GROUPS = {
+    "destination": "$destination_id",
+    "hotel": "$hotel_id",
+    "month": {"$substrCP": ["$check_in", 0, 7]},
+}
+
+EXPORT_COLUMNS = [
+    "id", "user_email", "destination_id", "hotel_id", "check_in", "check_out",
+    "guests", "total_price", "status", "created_at",
+]
+
+
+def _date_match(start: Optional[date], end: Optional[date]) -> Dict:
+    """Match bookings whose check-in falls inside [start, end).
+
+    Dates are stored as ISO strings, so lexical comparison is date order.
+    """
+    check_in = {}
+    if start:
+        check_in["$gte"] = start.isoformat()
+    if end:
+        check_in["$lt"] = end.isoformat()
+    return {"check_in": check_in} if check_in else {}
+
+
+def revenue_pipeline(group_by: str, start: Optional[date] = None, end: Optional[date] = None) -> List[Dict]:
+    if group_by not in REVENUE_GROUPS:
+        raise ValueError(f"group_by must be one of {sorted(REVENUE_GROUPS)}")
+    match = _date_match(start, end)
+    match["status"] = {"$nin": UNREALISED_STATUSES}
+    return [
+        {"$match": match},
+        {"$group": {
+            "_id": REVENUE_GROUPS[group_by],
+            "revenue": {"$sum": "$total_price"},
+            "bookings": {"$sum": 1},
+            "guests": {"$sum": "$guests"},
+        }},
+        {"$project": {
+            "_id": 0,
+            "key": "$_id",
+            "revenue": 1,
+            "bookings": 1,
+            "guests": 1,
+            "avg_booking_value": {"$divide": ["$revenue", "$bookings"]},
+        }},
+        {"$sort": {"key": 1} if group_by == "month" else {"revenue": -1}},
+    ]
+
+
+def cancellation_pipeline(group_by: str, start: Optional[date] = None, end: Optional[date] = None) -> List[Dict]:
+    if group_by not in REVENUE_GROUPS:
+        raise ValueError(f"group_by must be one of {sorted(REVENUE_GROUPS)}")
+    return [
+        {"$match": _date_match(start, end)},
+        {"$group": {
+            "_id": REVENUE_GROUPS[group_by],
+            "bookings": {"$sum": 1},
+            "cancelled": {"$sum": {"$cond": [{"$eq": ["$status", "cancelled"]}, 1, 0]}},
+        }},
+        {"$project": {
+            "_id": 0,
+            "key": "$_id",
+            "bookings": 1,
+            "cancelled": 1,
+            "cancellation_rate": {"$divide": ["$cancelled", "$bookings"]},
+        }},
+        {"$sort": {"key": 1}},
+    ]
+
+
+def lead_time_pipeline(start: Optional[date] = None, end: Optional[date] = None) -> List[Dict]:
+    """Project only the lead time (days between booking and check-in)."""
+    return [
+        {"$match": _date_match(start, end)},
+        {"$project": {
+            "_id": 0,
+            "lead_days": {"$divide": [
+                {"$subtract": [{"$dateFromString": {"dateString": "$check_in"}}, "$created_at"]},
+                MS_PER_DAY,
+            ]},
+        }},
+    ]
+
+
+def booked_nights_pipeline(start: date, end: date) -> List[Dict]:
+    """Sum booked nights per hotel, clipped to the [start, end) window."""
+    window_start = datetime.combine(start, datetime.min.time())
+    window_end = datetime.combine(end, datetime.min.time())
+    return [
+        {"$match": {
+            "hotel_id": {"$ne": None},
+            "status": {"$nin": UNREALISED_STATUSES},
+            "check_in": {"$lt": end.isoformat()},
+            "check_out": {"$gt": start.isoformat()},
+        }},
+        {"$project": {
+            "hotel_id": 1,
+            "nights": {"$divide": [
+                {"$subtract": [
+                    {"$min": [{"$dateFromString": {"dateString": "$check_out"}}, window_end]},
+                    {"$max": [{"$dateFromString": {"dateString": "$check_in"}}, window_start]},
+                ]},
+                MS_PER_DAY,
+            ]},
+        }},
+        {"$group": {"_id": "$hotel_id", "booked_nights": {"$sum": "$nights"}}},
+    ]
+
+
+async def _archive_collections(db, start: Optional[date], end: Optional[date]) -> List[str]:
+    """Archive months whose check-ins can fall inside [start, end)."""
+    names = await db.list_collection_names(filter={"name": {"$regex": f"^{ARCHIVE_PREFIX}"}})
+    low = archive_name(start.isoformat()) if start else None
+    high = archive_name(end.isoformat()) if end else None
+    return sorted(
+        name for name in names
+        if (low is None or name >= low) and (high is None or name <= high)
+    )
+
+
+async def _aggregate(db, pipeline: List[Dict], start: Optional[date], end: Optional[date], **kwargs):
+    """Run ``pipeline`` over hot bookings plus the matching archive months.
+
+    The leading ``$match`` is repeated inside each ``$unionWith`` so every
+    archive is filtered on its own indexes before documents are merged.
+    """
+    match, rest = pipeline[0], pipeline[1:]
+    unions = [
+        {"$unionWith": {"coll": name, "pipeline": [match]}}
+        for name in await _archive_collections(db, start, end)
+    ]
+    return db.bookings.aggregate([match] + unions + rest, **kwargs)
+
+
+async def revenue(db, group_by: str, start: Optional[date] = None, end: Optional[date] = None) -> List[Dict]:
+    cursor = await _aggregate(db, revenue_pipeline(group_by, start, end), start, end)
+    return await cursor.to_list(None)
+
+
+async def cancellation_rate(db, group_by: str, start: Optional[date] = None, end: Optional[date] = None) -> List[Dict]:
+    cursor = await _aggregate(db, cancellation_pipeline(group_by, start, end), start, end)
+    return await cursor.to_list(None)
+
+
+async def lead_time(db, start: Optional[date] = None, end: Optional[date] = None) -> Dict:
+    """Lead-time distribution in days, summarised with NumPy."""
+    cursor = await _aggregate(db, lead_time_pipeline(start, end), start, end, batchSize=10_000)
+    chunks = []
+    buffer = []
+    async for row in cursor:
+        buffer.append(row["lead_days"])
+        if len(buffer) >= 10_000:
+            chunks.append(np.asarray(buffer, dtype=np.float64))
+            buffer = []
+    if buffer:
+        chunks.append(np.asarray(buffer, dtype=np.float64))
+    if not chunks:
+        return {"bookings": 0}
+
+    values = np.concatenate(chunks)
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {
+        "bookings": int(values.size),
+        "mean_days": float(values.mean()),
+        "p50_days": float(p50),
+        "p90_days": float(p90),
+        "p99_days": float(p99),
+        "max_days": float(values.max()),
+    }
+
+
+async def occupancy(db, start: date, end: date) -> List[Dict]:
+    """Occupancy per hotel over [start, end).
+
+    Each hotel is treated as a single bookable unit: occupancy is booked
+    nights divided by the nights it was available inside the window.
+    """
+    # Stay length is unbounded, so a stay overlapping the window may have
+    # checked in any month before it: read every archive up to ``end`` and
+    # let the check_out filter discard stays that ended earlier
+    cursor = await _aggregate(db, booked_nights_pipeline(start, end), None, end)
+    booked = await cursor.to_list(None)
+    hotels = await db.hotels.find(
+        {},
+        {"_id": 0, "id": 1, "name": 1, "destination_id": 1, "available_from": 1, "available_to": 1},
+    ).to_list(None)
+    if not hotels:
+        return []
+
+    frame = pd.DataFrame(hotels)
+    window_start = pd.Timestamp(start)
+    window_end = pd.Timestamp(end)
+    available_from = pd.to_datetime(frame["available_from"]).clip(lower=window_start)
+    available_to = pd.to_datetime(frame["available_to"]).clip(upper=window_end)
+    frame["available_nights"] = (available_to - available_from).dt.days.clip(lower=0)
+
+    booked_frame = pd.DataFrame(booked, columns=["_id", "booked_nights"]).rename(columns={"_id": "id"})
+    frame = frame.merge(booked_frame, on="id", how="left")
+    frame["booked_nights"] = frame["booked_nights"].fillna(0.0)
+    frame["occupancy_rate"] = np.where(
+        frame["available_nights"] > 0,
+        np.minimum(frame["booked_nights"] / frame["available_nights"].replace(0, np.nan), 1.0),
+        0.0,
+    )
+    frame = frame.sort_values("occupancy_rate", ascending=False)
+    columns = ["id", "name", "destination_id", "available_nights", "booked_nights", "occupancy_rate"]
+    return frame[columns].rename(columns={"id": "hotel_id"}).to_dict(orient="records")
+
+
+# Columnar export
+def _export_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.string()),
+        ("user_email", pa.string()),
+        ("destination_id", pa.string()),
+        ("hotel_id", pa.string()),
+        ("check_in", pa.date32()),
+        ("check_out", pa.date32()),
+        ("guests", pa.int32()),
+        ("total_price", pa.float64()),
+        ("status", pa.string()),
+        ("created_at", pa.timestamp("ms")),
+    ])
+
+
+def _chunk_to_table(rows: List[Dict], schema):
+    import pyarrow as pa
+
+    frame = pd.DataFrame(rows, columns=EXPORT_COLUMNS)
+    frame["check_in"] = pd.to_datetime(frame["check_in"]).dt.date
+    frame["check_out"] = pd.to_datetime(frame["check_out"]).dt.date
+    frame["created_at"] = pd.to_datetime(frame["created_at"])
+    return pa.Table.from_pandas(frame, schema=schema, preserve_index=False)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only sink whose buffered bytes can be drained between chunks."""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+async def export_bookings(
+    db,
+    fmt: str = "parquet",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    chunk_size: int = 50_000,
+) -> AsyncIterator[bytes]:
+    """Stream bookings as Parquet (one row group per chunk) or Arrow IPC."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if fmt not in ("parquet", "arrow"):
+        raise ValueError("fmt must be 'parquet' or 'arrow'")
+
+    schema = _export_schema()
+    sink = _ChunkSink()
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+
+    projection = {"_id": 0, **{column: 1 for column in EXPORT_COLUMNS}}
+    collections = await _archive_collections(db, start, end) + ["bookings"]
+    rows = []
+    for name in collections:
+        cursor = db[name].find(_date_match(start, end), projection).batch_size(min(chunk_size, 10_000))
+        async for booking in cursor:
+            rows.append(booking)
+            if len(rows) >= chunk_size:
+                writer.write_table(_chunk_to_table(rows, schema))
+                rows = []
+                yield sink.drain()
+    if rows:
+        writer.write_table(_chunk_to_table(rows, schema))
+    writer.close()
+    yield sink.drain()
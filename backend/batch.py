@@ -0,0 +1,165 @@
+"""Multiplexed ``POST /api/batch``: several API calls in one HTTP round-trip.
+
+Sub-requests are dispatched concurrently straight into the application's
+router (no network hop, no re-parsing of the outer request), each one still
+passing through the per-route rate limits and concurrency pools so batching
+cannot be used to dodge them. Sub-requests share the global-pool slot the
+outer request already holds instead of queueing for more. The batch as a
+whole runs under one time budget; anything not finished when it expires is
+cancelled and reported as 504.
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, Field
+from starlette.exceptions import HTTPException
+
+from admission import AdmissionController, Shed
+
+logger = logging.getLogger(__name__)
+
+MAX_SUB_REQUESTS = 20
+ALLOWED_METHODS = {"GET", "POST"}
+# Sub-requests that would recurse or stream instead of returning JSON
+EXCLUDED_PATHS = ("/api/batch", "/api/analytics/export", "/api/live")
+
+
+class SubRequest(BaseModel):
+    id: Optional[str] = None
+    method: str = "GET"
+    path: str
+    body: Optional[Any] = None
+
+
+class BatchRequest(BaseModel):
+    requests: List[SubRequest] = Field(..., min_length=1, max_length=MAX_SUB_REQUESTS)
+    timeout: float = Field(8.0, gt=0, le=30)
+
+
+class SubResponse(BaseModel):
+    id: Optional[str] = None
+    status: int
+    body: Any = None
+    elapsed_ms: float
+
+
+class BatchResponse(BaseModel):
+    responses: List[SubResponse]
+    elapsed_ms: float
+
+
+class BatchDispatcher:
+    def __init__(self, router, admission: Optional[AdmissionController] = None):
+        self.router = router
+        self.admission = admission
+
+    def _scope(self, parent_scope: Dict, method: str, path: str, query: str, body: bytes) -> Dict:
+        headers = [
+            (name, value) for name, value in parent_scope.get("headers", [])
+            if name in (b"authorization", b"accept-language", b"user-agent", b"x-forwarded-for")
+        ]
+        headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        return {
+            "type": "http",
+            "asgi": parent_scope.get("asgi", {"version": "3.0"}),
+            "http_version": parent_scope.get("http_version", "1.1"),
+            "method": method,
+            "scheme": parent_scope.get("scheme", "http"),
+            "server": parent_scope.get("server"),
+            "client": parent_scope.get("client"),
+            "root_path": parent_scope.get("root_path", ""),
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "headers": headers,
+            "app": parent_scope.get("app"),
+            "state": {},
+        }
+
+    async def _call(self, scope: Dict, body: bytes):
+        sent = False
+        status = 500
+        chunks = []
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # Nothing more will arrive; park like an idle connection would
+            await asyncio.Event().wait()
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        try:
+            await self.router(scope, receive, send)
+        except HTTPException as error:
+            return error.status_code, {"detail": error.detail}
+        except RequestValidationError as error:
+            return 422, {"detail": jsonable_encoder(error.errors())}
+
+        payload = b"".join(chunks)
+        return status, json.loads(payload) if payload else None
+
+    async def dispatch(self, parent_scope: Dict, request: SubRequest):
+        method = request.method.upper()
+        path, _, query = request.path.partition("?")
+        if method not in ALLOWED_METHODS or not path.startswith("/api/") or path.startswith(EXCLUDED_PATHS):
+            return 400, {"detail": f"{method} {path} cannot be batched"}
+
+        held = []
+        if self.admission is not None:
+            rule = self.admission.match(method, path)
+            if rule is not None:
+                try:
+                    held = await self.admission.admit(
+                        rule, self.admission.client_key(parent_scope), use_global=False
+                    )
+                except Shed as shed:
+                    status = 429 if shed.reason == "rate limited" else 503
+                    return status, {"detail": shed.reason, "retry_after": shed.retry_after}
+        try:
+            body = json.dumps(request.body).encode() if request.body is not None else b""
+            return await self._call(self._scope(parent_scope, method, path, query, body), body)
+        finally:
+            for limiter in held:
+                limiter.release()
+
+    async def run(self, parent_scope: Dict, batch: BatchRequest) -> Dict:
+        started = time.perf_counter()
+        finished_at = {}
+
+        async def timed(index, request):
+            result = await self.dispatch(parent_scope, request)
+            finished_at[index] = time.perf_counter()
+            return result
+
+        tasks = [asyncio.create_task(timed(i, request)) for i, request in enumerate(batch.requests)]
+        done, pending = await asyncio.wait(tasks, timeout=batch.timeout)
+        for task in pending:
+            task.cancel()
+
+        responses = []
+        for index, (request, task) in enumerate(zip(batch.requests, tasks)):
+            if task in pending:
+                status, body = 504, {"detail": "Batch time budget exceeded"}
+                elapsed = batch.timeout
+            else:
+                try:
+                    status, body = task.result()
+                except Exception:
+                    logger.exception(f"Batch sub-request {request.method} {request.path} failed")
+                    status, body = 500, {"detail": "Internal Server Error"}
+                elapsed = finished_at.get(index, time.perf_counter()) - started
+            responses.append({"id": request.id, "status": status, "body": body, "elapsed_ms": round(elapsed * 1000, 2)})
+        return {"responses": responses, "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)}
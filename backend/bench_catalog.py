@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Benchmark: columnar CatalogStore versus the MongoDB query path.
+
+Builds a synthetic catalog with datagen, reports the store's memory footprint and
+per-query latency, and with --mongo loads the same catalog into a scratch
+database (<DB_NAME>_bench) to time the equivalent find() + Pydantic path.
+
+    python bench_catalog.py --destinations 5000 --hotels 20000 --mongo
+"""
+
+import argparse
+import asyncio
+import os
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+load_dotenv(Path(__file__).parent / '.env')
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'test_database')
+
+import datagen  # noqa: E402
+from catalog_store import CatalogStore  # noqa: E402
+import pricing  # noqa: E402
+from server import Destination, Hotel  # noqa: E402
+
+def timed(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def timed_async(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await function()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def summary(samples):
+    p50, p99 = np.percentile(np.asarray(samples) * 1e6, [50, 99])
+    return f"p50 {p50:9.1f}us  p99 {p99:9.1f}us"
+
+
+def store_queries(store, destination_id):
+    return {
+        "get_destinations(type)": lambda: store.destinations_page("beach", 20),
+        "get_destination(id)": lambda: store.get_destination(destination_id),
+        "search(substring)": lambda: store.search_destinations("fra", None, 4.0),
+        "search(rare term)": lambda: store.search_destinations("zzzqq"),
+        "top-10 by rating": lambda: store.top_destinations(10),
+        "price sort + tier filter": lambda: store.destinations_page("beach", 20, "price_asc", max_tier=3),
+        "get_hotels(destination)": lambda: store.hotels_page(destination_id),
+    }
+
+
+def mongo_queries(db, destination_id):
+    async def get_destinations():
+        return [Destination(**d) for d in await db.destinations.find({"type": "beach"}).limit(20).to_list(20)]
+
+    async def get_destination():
+        return Destination(**await db.destinations.find_one({"id": destination_id}))
+
+    async def search(term, min_rating=None):
+        query = {"$or": [{field: {"$regex": term, "$options": "i"}} for field in ("name", "country", "description")]}
+        if min_rating:
+            query["rating"] = {"$gte": min_rating}
+        return [Destination(**d) for d in await db.destinations.find(query).limit(20).to_list(20)]
+
+    async def top_10():
+        return [Destination(**d) for d in await db.destinations.find().sort("rating", -1).limit(10).to_list(10)]
+
+    async def price_sorted():
+        cursor = db.destinations.find({"type": "beach", "price_tier": {"$lte": 3}}).sort(pricing.SORTS["price_asc"])
+        return [Destination(**d) for d in await cursor.limit(20).to_list(20)]
+
+    async def get_hotels():
+        return [Hotel(**h) for h in await db.hotels.find({"destination_id": destination_id}).limit(20).to_list(20)]
+
+    return {
+        "get_destinations(type)": get_destinations,
+        "get_destination(id)": get_destination,
+        "search(substring)": lambda: search("fra", 4.0),
+        "search(rare term)": lambda: search("zzzqq"),
+        "top-10 by rating": top_10,
+        "price sort + tier filter": price_sorted,
+        "get_hotels(destination)": get_hotels,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--destinations", type=int, default=5000)
+    parser.add_argument("--hotels", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mongo", action="store_true", help="Also time the MongoDB path")
+    args = parser.parse_args()
+
+    destination_docs = list(datagen.generate_destinations(args.destinations, args.seed))
+    hotel_docs = list(datagen.generate_hotels(args.hotels, args.destinations, args.seed))
+    from_prices = {}
+    for hotel in hotel_docs:
+        from_prices[hotel["destination_id"]] = min(
+            hotel["price_per_night"], from_prices.get(hotel["destination_id"], float("inf"))
+        )
+    for destination in destination_docs:
+        destination["from_price"] = from_prices.get(destination["id"])
+    destination_id = destination_docs[min(7, len(destination_docs) - 1)]["id"]
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    store = CatalogStore(Destination, Hotel)
+    started = time.perf_counter()
+    store.set_destinations(destination_docs)
+    store.set_hotels(hotel_docs)
+    build_seconds = time.perf_counter() - started
+    footprint = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    print(f"Catalog: {args.destinations} destinations, {args.hotels} hotels")
+    print(f"Store build: {build_seconds * 1000:.1f}ms")
+    print(f"Store memory: {footprint / 2**20:.1f} MiB total "
+          f"(columns {store.stats()['array_bytes'] / 2**20:.2f} MiB, rest is prebuilt response objects)")
+    print()
+
+    results = {name: summary(timed(query, args.repeat)) for name, query in store_queries(store, destination_id).items()}
+    mongo_results = {}
+    if args.mongo:
+        client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+        db = client[os.environ['DB_NAME'] + "_bench"]
+        await db.destinations.drop()
+        await db.hotels.drop()
+        await db.destinations.insert_many([dict(doc) for doc in destination_docs])
+        await db.hotels.insert_many([dict(doc) for doc in hotel_docs])
+        await db.destinations.create_index("id")
+        await db.destinations.create_index("type")
+        await db.hotels.create_index("destination_id")
+        await pricing.ensure_indexes(db)
+        for name, query in mongo_queries(db, destination_id).items():
+            mongo_results[name] = summary(await timed_async(query, max(args.repeat // 10, 10)))
+        client.close()
+
+    for name, result in results.items():
+        line = f"{name:26s} store  {result}"
+        if name in mongo_results:
+            line += f"   | mongo  {mongo_results[name]}"
+        print(line)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memory per idle live-update connection.
+
+Opens N idle SSE connections (raw sockets, no client library) subscribed to
+a handful of hotel/destination topics, then reads /api/live/stats before and
+after to report server RSS growth per connection. Optionally publishes one
+booking and checks how many connections receive it.
+
+New live connections are rate limited per client address (burst 10, then one
+per second), so from a single host start the server with the live burst
+raised above the connection count:
+
+    ADMISSION_LIVE_BURST=100000 uvicorn server:app --port 8001
+    ulimit -n 20000
+    python bench_live.py --base-url http://localhost:8001 --connections 5000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+
+import requests
+
+
+async def open_sse(host, port, topics):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(
+        f"GET /api/live/events?topics={topics} HTTP/1.1\r\n"
+        f"Host: {host}\r\nAccept: text/event-stream\r\n\r\n".encode()
+    )
+    await writer.drain()
+    # Status line, headers and the initial ": connected" comment
+    await reader.readuntil(b": connected\n\n")
+    return reader, writer
+
+
+async def wait_for_event(reader, timeout):
+    try:
+        while True:
+            line = await asyncio.wait_for(reader.readline(), timeout)
+            if line.startswith(b"event: availability"):
+                return True
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+        return False
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--connections", type=int, default=2000)
+    parser.add_argument("--topics", type=int, default=10, help="Distinct destinations to spread subscribers over")
+    parser.add_argument("--open-concurrency", type=int, default=200)
+    parser.add_argument("--publish", action="store_true", help="Create one booking and count deliveries")
+    args = parser.parse_args()
+
+    api = f"{args.base_url}/api"
+    url = urlsplit(args.base_url)
+    host, port = url.hostname, url.port or 80
+
+    destinations = requests.get(f"{api}/destinations", params={"limit": args.topics}, timeout=30).json()
+    topics = [f"destination:{destination['id']}" for destination in destinations] or ["destination:none"]
+    before = requests.get(f"{api}/live/stats", timeout=30).json()
+
+    semaphore = asyncio.Semaphore(args.open_concurrency)
+    connections = []
+    rejected = 0
+    started = time.perf_counter()
+
+    async def connect(i):
+        async with semaphore:
+            try:
+                connections.append((await open_sse(host, port, topics[i % len(topics)]), topics[i % len(topics)]))
+            except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                nonlocal rejected
+                rejected += 1
+
+    await asyncio.gather(*(connect(i) for i in range(args.connections)))
+    opened = time.perf_counter() - started
+    await asyncio.sleep(1)
+    after = requests.get(f"{api}/live/stats", timeout=30).json()
+
+    growth = (after["rss_bytes"] or 0) - (before["rss_bytes"] or 0)
+    print(f"Opened {len(connections)}/{args.connections} idle SSE connections in {opened:.1f}s")
+    if rejected:
+        print(f"{rejected} connections refused or rate limited; is ADMISSION_LIVE_BURST above --connections?")
+    print(f"Server: {json.dumps(after)}")
+    if connections:
+        print(f"RSS growth {growth / 2**20:.1f} MiB, {growth / len(connections) / 1024:.1f} KiB per connection")
+
+    if args.publish and destinations:
+        check_in = date.today() + timedelta(days=30)
+        requests.post(f"{api}/bookings", json={
+            "user_name": "Bench",
+            "user_email": "bench@example.com",
+            "destination_id": destinations[0]["id"],
+            "check_in": check_in.isoformat(),
+            "check_out": (check_in + timedelta(days=2)).isoformat(),
+            "guests": 1,
+            "total_price": 100.0,
+        }, timeout=30)
+        listeners = [reader for (reader, _), topic in connections if topic == topics[0]]
+        received = await asyncio.gather(*(wait_for_event(reader, 5) for reader in listeners))
+        print(f"Booking event delivered to {sum(received)}/{len(listeners)} subscribers of {topics[0]}")
+
+    for (_, writer), _ in connections:
+        writer.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,266 @@
+"""Per-worker catalog cache kept coherent across workers and nodes.
+
+Every uvicorn worker holds its own ``LocalCache`` of destination and hotel
+documents. An ``InvalidationBus`` feeds it from a MongoDB change stream on the
+catalog collections (resuming from the last seen token after a disconnect) and
+pushes each insert/update as a delta, so other workers see a
+``create_destination``/``create_hotel`` within milliseconds. On deployments
+without change streams (standalone mongod) the bus falls back to polling a
+small version document that writers bump on every catalog write.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+CATALOG_COLLECTIONS = ("destinations", "hotels")
+VERSION_COLLECTION = "catalog_versions"
+VERSION_DOC_ID = "catalog"
+
+# Server error codes meaning change streams cannot be used at all
+CHANGE_STREAMS_UNSUPPORTED = {
+    40573,  # The $changeStream stage is only supported on replica sets
+    40324,  # Unrecognized pipeline stage name: '$changeStream'
+    115,    # CommandNotSupported
+}
+# The resume token has fallen off the oplog
+CHANGE_STREAM_HISTORY_LOST = {286, 280}
+# How long a local write waits for its change-stream echo before it is forgotten
+ECHO_WINDOW_SECONDS = 30.0
+
+Listener = Callable[[str, Optional[Dict]], None]
+
+
+class LocalCache:
+    """In-process cache of catalog documents and query results.
+
+    Documents are stored by ``(collection, id)`` and updated in place from
+    change deltas; query results are stored by ``(collection, key)`` and are
+    dropped whenever anything in that collection changes. Query keys carry
+    request parameters, so at most ``max_queries`` results are kept, least
+    recently used first out.
+    """
+
+    def __init__(self, ttl_seconds: float = 300.0, max_queries: int = 2048):
+        self.ttl_seconds = ttl_seconds
+        self.max_queries = max_queries
+        self._documents: Dict[Tuple[str, str], Tuple[float, Dict]] = {}
+        self._queries: "OrderedDict[Tuple[str, Hashable], Tuple[float, object]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _fresh(self, stored_at: float) -> bool:
+        return time.monotonic() - stored_at < self.ttl_seconds
+
+    def get_document(self, collection: str, doc_id: str) -> Optional[Dict]:
+        entry = self._documents.get((collection, doc_id))
+        if entry and self._fresh(entry[0]):
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def set_document(self, collection: str, document: Dict) -> None:
+        self._documents[(collection, document["id"])] = (time.monotonic(), document)
+
+    def get_query(self, collection: str, key: Hashable):
+        entry = self._queries.get((collection, key))
+        if entry and self._fresh(entry[0]):
+            self._queries.move_to_end((collection, key))
+            self.hits += 1
+            return entry[1]
+        if entry:
+            del self._queries[(collection, key)]
+        self.misses += 1
+        return None
+
+    def set_query(self, collection: str, key: Hashable, result) -> None:
+        self._queries[(collection, key)] = (time.monotonic(), result)
+        self._queries.move_to_end((collection, key))
+        while len(self._queries) > self.max_queries:
+            self._queries.popitem(last=False)
+
+    def apply_delta(self, collection: str, document: Dict) -> None:
+        """Upsert one changed document and drop that collection's query results."""
+        self.set_document(collection, document)
+        self.invalidate_queries(collection)
+
+    def invalidate(self, collection: str, doc_id: Optional[str] = None) -> None:
+        if doc_id is None:
+            self._documents = {k: v for k, v in self._documents.items() if k[0] != collection}
+        else:
+            self._documents.pop((collection, doc_id), None)
+        self.invalidate_queries(collection)
+
+    def invalidate_queries(self, collection: str) -> None:
+        self._queries = OrderedDict((k, v) for k, v in self._queries.items() if k[0] != collection)
+
+    def clear(self) -> None:
+        self._documents.clear()
+        self._queries.clear()
+
+    def stats(self) -> Dict:
+        return {
+            "documents": len(self._documents),
+            "queries": len(self._queries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class InvalidationBus:
+    """Keeps a ``LocalCache`` in sync with catalog writes from any worker."""
+
+    def __init__(self, cache: LocalCache, poll_interval: float = 0.5):
+        self.cache = cache
+        self.poll_interval = poll_interval
+        self.mode: Optional[str] = None
+        self.resume_token = None
+        self._listeners: List[Listener] = []
+        self._versions: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        # (collection, id) -> (pending echoes, last publish time) of local writes
+        self._local_writes: Dict[Tuple[str, str], Tuple[int, float]] = {}
+
+    def subscribe(self, listener: Listener) -> None:
+        """Register ``listener(collection, document_or_None)`` for every change.
+
+        ``document`` is the changed document when known, or ``None`` when the
+        whole collection should be treated as changed.
+        """
+        self._listeners.append(listener)
+
+    def _emit(self, collection: str, document: Optional[Dict]) -> None:
+        if document is not None:
+            self.cache.apply_delta(collection, document)
+        else:
+            self.cache.invalidate(collection)
+        for listener in self._listeners:
+            try:
+                listener(collection, document)
+            except Exception:
+                logger.exception("Catalog change listener failed")
+
+    async def publish(self, db, collection: str, document: Optional[Dict] = None) -> None:
+        """Record a local write: update this worker now and bump the shared version."""
+        if document is not None:
+            document = {k: v for k, v in document.items() if k != "_id"}
+            if self.mode == "change_stream":
+                self._expect_echo(collection, document["id"])
+        self._emit(collection, document)
+        result = await db[VERSION_COLLECTION].find_one_and_update(
+            {"_id": VERSION_DOC_ID},
+            {"$inc": {collection: 1}},
+            upsert=True,
+            return_document=True,
+        )
+        if result:
+            # Our own bump should not trigger a second invalidation when polling,
+            # but any other worker's bump since the last poll must not be lost
+            version = result.get(collection, 0)
+            previous = self._versions.get(collection)
+            self._versions[collection] = version
+            if self.mode == "polling" and previous is not None and version != previous + 1:
+                self._emit(collection, None)
+
+    def _expect_echo(self, collection: str, doc_id: str) -> None:
+        now = time.monotonic()
+        if len(self._local_writes) > 10_000:
+            self._local_writes = {
+                key: (count, published) for key, (count, published) in self._local_writes.items()
+                if now - published < ECHO_WINDOW_SECONDS
+            }
+        count, _ = self._local_writes.get((collection, doc_id), (0, now))
+        self._local_writes[(collection, doc_id)] = (count + 1, now)
+
+    def _is_echo(self, collection: str, doc_id: str) -> bool:
+        """True (once) for the change-stream copy of a write this worker already applied."""
+        key = (collection, doc_id)
+        pending = self._local_writes.get(key)
+        if pending is None:
+            return False
+        count, published = pending
+        if count > 1:
+            self._local_writes[key] = (count - 1, published)
+        else:
+            del self._local_writes[key]
+        return time.monotonic() - published < ECHO_WINDOW_SECONDS
+
+    def start(self, db) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, db) -> None:
+        while True:
+            try:
+                self.mode = "change_stream"
+                await self._watch(db)
+            except OperationFailure as error:
+                if error.code in CHANGE_STREAMS_UNSUPPORTED:
+                    logger.info("Change streams unavailable, polling catalog version document")
+                    self.mode = "polling"
+                    await self._poll(db)
+                    return
+                if error.code in CHANGE_STREAM_HISTORY_LOST:
+                    logger.warning("Change stream resume token expired, flushing catalog cache")
+                    self.resume_token = None
+                    for collection in CATALOG_COLLECTIONS:
+                        self._emit(collection, None)
+                    continue
+                logger.exception("Change stream failed, reconnecting")
+            except PyMongoError:
+                logger.exception("Change stream connection lost, reconnecting")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _watch(self, db) -> None:
+        pipeline = [{"$match": {
+            "ns.coll": {"$in": list(CATALOG_COLLECTIONS)},
+            "operationType": {"$in": ["insert", "update", "replace", "delete", "drop"]},
+        }}]
+        async with db.watch(
+            pipeline,
+            full_document="updateLookup",
+            resume_after=self.resume_token,
+        ) as stream:
+            async for change in stream:
+                if change["operationType"] == "invalidate":
+                    # Database dropped: the stream cannot be resumed past this
+                    self.resume_token = None
+                    for collection in CATALOG_COLLECTIONS:
+                        self._emit(collection, None)
+                    return
+                self.resume_token = stream.resume_token
+                collection = change["ns"]["coll"]
+                document = change.get("fullDocument")
+                if document is not None:
+                    document.pop("_id", None)
+                    if self._is_echo(collection, document.get("id")):
+                        continue
+                self._emit(collection, document)
+
+    async def _poll(self, db) -> None:
+        while True:
+            try:
+                current = await db[VERSION_COLLECTION].find_one({"_id": VERSION_DOC_ID}) or {}
+                for collection in CATALOG_COLLECTIONS:
+                    version = current.get(collection, 0)
+                    if self._versions.get(collection, version) != version:
+                        self._emit(collection, None)
+                    self._versions[collection] = version
+            except PyMongoError:
+                logger.exception("Polling catalog version failed")
+            await asyncio.sleep(self.poll_interval)
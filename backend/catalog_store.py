@@ -0,0 +1,399 @@
+"""Read-side columnar catalog engine for destinations and hotels.
+
+The whole catalog is small enough to live in RAM, so filters, sorts and top-K
+for ``get_destinations``/``get_hotels``/``search_destinations`` run here
+instead of round-tripping to MongoDB. Each entity type is held as parallel
+NumPy arrays (ratings, prices and coordinates as float32, enum-like fields as
+small integer codes, strings interned), and queries are evaluated as
+vectorized boolean masks. Response objects are built once at load time, so a
+query only gathers the rows it returns.
+
+The store is refreshed from the catalog invalidation bus: change deltas are
+applied in place and collection-wide invalidations trigger a reload.
+"""
+import asyncio
+import logging
+import re
+import sys
+from bisect import bisect_right
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Regex metacharacters; only queries without them are served from the store
+_REGEX_META = re.compile(r"[.^$*+?{}\[\]\\|()]")
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class _Column:
+    """NumPy column with spare capacity, so appending a row is amortised O(1)."""
+
+    def __init__(self, values: Iterable, dtype, count: int):
+        self._data = np.fromiter(values, dtype=dtype, count=count)
+
+    def set(self, row: int, value) -> None:
+        if row >= len(self._data):
+            grown = np.empty(max(16, 2 * len(self._data)), dtype=self._data.dtype)
+            grown[:len(self._data)] = self._data
+            self._data = grown
+        self._data[row] = value
+
+    def view(self, rows: int) -> np.ndarray:
+        return self._data[:rows]
+
+
+class _Codes:
+    """Dictionary encoding of a low-cardinality string column."""
+
+    def __init__(self, values: List[str]):
+        self.labels = sorted({_intern(str(v)) for v in values})
+        self.index = {label: code for code, label in enumerate(self.labels)}
+        self._column = _Column((self.index[str(v)] for v in values), np.int32, len(values))
+        self.codes = self._column.view(len(values))
+
+    def code(self, value) -> int:
+        return self.index.get(str(getattr(value, "value", value)), -1)
+
+    def set(self, row: int, value) -> None:
+        label = _intern(str(value))
+        code = self.index.get(label)
+        if code is None:
+            code = self.index[label] = len(self.labels)
+            self.labels.append(label)
+        self._column.set(row, code)
+
+    def resize(self, rows: int) -> None:
+        self.codes = self._column.view(rows)
+
+
+class _Table:
+    """Rows of one collection as parallel columns plus prebuilt response objects.
+
+    ``COLUMNS`` maps attribute names to ``(dtype, extract)`` for numeric
+    columns and ``CODES`` maps attribute names to ``extract`` for dictionary
+    encoded ones. ``upsert`` patches or appends a single row in place.
+    """
+
+    COLUMNS: Dict[str, Tuple] = {}
+    CODES: Dict[str, Callable] = {}
+
+    def __init__(self, documents: List[Dict], objects: List):
+        self.documents = documents
+        self.objects = objects
+        self.ids = {_intern(doc["id"]): row for row, doc in enumerate(documents)}
+        self._columns = {
+            name: _Column((extract(doc) for doc in documents), dtype, len(documents))
+            for name, (dtype, extract) in self.COLUMNS.items()
+        }
+        for name, extract in self.CODES.items():
+            setattr(self, name, _Codes([extract(doc) for doc in documents]))
+        self._expose()
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def _expose(self) -> None:
+        rows = len(self.documents)
+        for name, column in self._columns.items():
+            setattr(self, name, column.view(rows))
+        for name in self.CODES:
+            getattr(self, name).resize(rows)
+
+    def upsert(self, document: Dict, obj) -> Optional[Dict]:
+        """Replace the row with ``document``'s id, or append one; returns the old document."""
+        row = self.ids.get(document["id"])
+        previous = None
+        if row is None:
+            row = len(self.documents)
+            self.ids[_intern(document["id"])] = row
+            self.documents.append(document)
+            self.objects.append(obj)
+        else:
+            previous = self.documents[row]
+            self.documents[row] = document
+            self.objects[row] = obj
+        for name, (_, extract) in self.COLUMNS.items():
+            self._columns[name].set(row, extract(document))
+        for name, extract in self.CODES.items():
+            getattr(self, name).set(row, extract(document))
+        self._expose()
+        return previous
+
+    def nbytes(self) -> int:
+        arrays = [getattr(self, name) for name in self.COLUMNS] + [getattr(self, name).codes for name in self.CODES]
+        return sum(array.nbytes for array in arrays)
+
+
+_TEXT_FIELDS = ("name", "country", "description")
+
+
+def _text(document: Dict) -> str:
+    return "\0".join(document[field] for field in _TEXT_FIELDS).lower()
+
+
+class DestinationTable(_Table):
+    COLUMNS = {
+        "rating": (np.float32, lambda doc: doc["rating"]),
+        # Unknown tier is 0 and a missing from price is NaN, so neither passes
+        # a price filter, matching MongoDB's range semantics for null
+        "price_tier": (np.int8, lambda doc: doc.get("price_tier") or 0),
+        "from_price": (np.float32, lambda doc: np.nan if doc.get("from_price") is None else doc["from_price"]),
+        "latitude": (np.float32, lambda doc: doc["latitude"]),
+        "longitude": (np.float32, lambda doc: doc["longitude"]),
+    }
+    CODES = {
+        "type": lambda doc: getattr(doc["type"], "value", doc["type"]),
+        "price_range": lambda doc: doc.get("price_range", ""),
+    }
+
+    def __init__(self, documents: List[Dict], objects: List):
+        super().__init__(documents, objects)
+        self._corpus: Optional[str] = None
+        self._offsets: List[int] = []
+
+    def upsert(self, document: Dict, obj) -> Optional[Dict]:
+        previous = super().upsert(document, obj)
+        if previous is None or _text(previous) != _text(document):
+            # Rebuilt on the next text search, so a burst of writes costs one rebuild
+            self._corpus = None
+        return previous
+
+    def _text_index(self) -> Tuple[str, List[int]]:
+        """Lower-cased name/country/description of every row in one string.
+
+        Fields are separated by NUL and rows by \\x01 so a plain substring can
+        never match across two fields; the offsets map positions to rows.
+        """
+        if self._corpus is None:
+            texts = [_text(doc) for doc in self.documents]
+            offsets, position = [], 0
+            for text in texts:
+                offsets.append(position)
+                position += len(text) + 1
+            self._corpus, self._offsets = "\x01".join(texts), offsets
+        return self._corpus, self._offsets
+
+    def substring_rows(self, needle: str, mask: np.ndarray, limit: Optional[int]) -> np.ndarray:
+        """First ``limit`` rows allowed by ``mask`` whose text contains ``needle``.
+
+        Scans the corpus left to right and jumps to the next row after every
+        hit, so common terms stop as soon as the page is full.
+        """
+        corpus, offsets = self._text_index()
+        rows = []
+        position = corpus.find(needle)
+        while position != -1:
+            row = bisect_right(offsets, position) - 1
+            if mask[row]:
+                rows.append(row)
+                if limit is not None and len(rows) >= limit:
+                    break
+            if row + 1 >= len(offsets):
+                break
+            position = corpus.find(needle, offsets[row + 1])
+        return np.asarray(rows, dtype=np.int64)
+
+    def nbytes(self) -> int:
+        corpus, offsets = self._text_index()
+        return super().nbytes() + sys.getsizeof(corpus) + 8 * len(offsets)
+
+
+class HotelTable(_Table):
+    COLUMNS = {
+        "price": (np.float32, lambda doc: doc["price_per_night"]),
+        "rating": (np.float32, lambda doc: doc["rating"]),
+        "latitude": (np.float32, lambda doc: doc["latitude"]),
+        "longitude": (np.float32, lambda doc: doc["longitude"]),
+    }
+    CODES = {"destination": lambda doc: doc["destination_id"]}
+
+
+def _take(objects: List, rows: np.ndarray) -> List:
+    return [objects[row] for row in rows.tolist()]
+
+
+def _top_k(values: np.ndarray, rows: np.ndarray, k: int, descending: bool = True) -> np.ndarray:
+    """Rows with the ``k`` best ``values``, in order, without a full sort."""
+    if rows.size > k:
+        keys = -values[rows] if descending else values[rows]
+        rows = rows[np.argpartition(keys, k - 1)[:k]]
+    keys = -values[rows] if descending else values[rows]
+    return rows[np.argsort(keys, kind="stable")]
+
+
+def _sort_destinations(table: DestinationTable, rows: np.ndarray, sort: Optional[str], limit: Optional[int]) -> np.ndarray:
+    """Order ``rows`` like the MongoDB sorts in ``pricing.SORTS``."""
+    if not sort:
+        return rows[:limit]
+    if sort == "rating":
+        return _top_k(table.rating, rows, limit or rows.size)
+    # Missing from prices sort lowest, as null does in MongoDB
+    from_price = np.nan_to_num(table.from_price[rows], nan=-np.inf)
+    primary = from_price if sort == "price_asc" else -from_price
+    return rows[np.lexsort((-table.rating[rows], primary))][:limit]
+
+
+class CatalogStore:
+    def __init__(self, destination_factory: Callable, hotel_factory: Callable):
+        self.destination_factory = destination_factory
+        self.hotel_factory = hotel_factory
+        self.destinations: Optional[DestinationTable] = None
+        self.hotels: Optional[HotelTable] = None
+        self._reloads: Dict[str, asyncio.Task] = {}
+        # Collections invalidated since their reload started, and the deltas
+        # received while one runs (replayed onto the freshly loaded table)
+        self._stale: Set[str] = set()
+        self._pending: Dict[str, List[Dict]] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self.destinations is not None and self.hotels is not None
+
+    def set_destinations(self, documents: List[Dict], objects: Optional[List] = None) -> None:
+        if objects is None:
+            objects = [self.destination_factory(**doc) for doc in documents]
+        self.destinations = DestinationTable(documents, objects)
+
+    def set_hotels(self, documents: List[Dict], objects: Optional[List] = None) -> None:
+        if objects is None:
+            objects = [self.hotel_factory(**doc) for doc in documents]
+        self.hotels = HotelTable(documents, objects)
+
+    async def load(self, db, collection: Optional[str] = None) -> None:
+        if collection in (None, "destinations"):
+            self.set_destinations(await db.destinations.find({}, {"_id": 0}).to_list(None))
+        if collection in (None, "hotels"):
+            self.set_hotels(await db.hotels.find({}, {"_id": 0}).to_list(None))
+
+    def apply_change(self, db, collection: str, document: Optional[Dict]) -> None:
+        """Invalidation-bus listener: apply a delta or schedule a reload."""
+        table = {"destinations": self.destinations, "hotels": self.hotels}.get(collection)
+        if table is None and collection not in ("destinations", "hotels"):
+            return
+        if document is None or table is None:
+            self._stale.add(collection)
+            running = self._reloads.get(collection)
+            if running is None or running.done():
+                self._reloads[collection] = asyncio.create_task(self._reload(db, collection))
+            return
+
+        if collection in self._pending:
+            self._pending[collection].append(document)
+        self._upsert(collection, table, document)
+
+    def _upsert(self, collection: str, table: _Table, document: Dict) -> None:
+        # Only the changed row gets a new response object and column entries
+        factory = self.destination_factory if collection == "destinations" else self.hotel_factory
+        table.upsert(document, factory(**document))
+
+    async def _reload(self, db, collection: str) -> None:
+        """Reload ``collection`` until no invalidation arrived during the load."""
+        while collection in self._stale:
+            self._stale.discard(collection)
+            self._pending[collection] = []
+            try:
+                await self.load(db, collection)
+            except Exception:
+                logger.exception(f"Catalog store reload of {collection} failed")
+                return
+            finally:
+                pending = self._pending.pop(collection)
+            table = self.destinations if collection == "destinations" else self.hotels
+            for document in pending:
+                self._upsert(collection, table, document)
+
+    # Queries
+    @staticmethod
+    def serves_query(query: Optional[str]) -> bool:
+        """Whether a search text can run here; regexes stay on mongod.
+
+        Matching a user regex in this process could block the event loop on a
+        pathological pattern, so only plain substrings are handled locally.
+        """
+        return not query or not _REGEX_META.search(query)
+
+    def get_destination(self, destination_id: str):
+        row = self.destinations.ids.get(destination_id)
+        return None if row is None else self.destinations.objects[row]
+
+    def filter_destinations(
+        self,
+        destination_type: Optional[str] = None,
+        min_rating: Optional[float] = None,
+        query: Optional[str] = None,
+        limit: Optional[int] = None,
+        min_tier: Optional[int] = None,
+        max_tier: Optional[int] = None,
+        min_from_price: Optional[float] = None,
+        max_from_price: Optional[float] = None,
+    ) -> np.ndarray:
+        """Matching rows in catalog order, at most ``limit`` of them."""
+        table = self.destinations
+        mask = np.ones(len(table), dtype=bool)
+        if destination_type:
+            mask &= table.type.codes == table.type.code(destination_type)
+        if min_rating:
+            mask &= table.rating >= np.float32(min_rating)
+        if min_tier is not None:
+            mask &= table.price_tier >= min_tier
+        if max_tier is not None:
+            mask &= (table.price_tier <= max_tier) & (table.price_tier > 0)
+        if min_from_price is not None:
+            mask &= table.from_price >= np.float32(min_from_price)
+        if max_from_price is not None:
+            mask &= table.from_price <= np.float32(max_from_price)
+        if not query:
+            return np.flatnonzero(mask)[:limit]
+        if not self.serves_query(query):
+            raise ValueError("Regex queries are not served from the catalog store")
+        return table.substring_rows(query.lower(), mask, limit)
+
+    def destinations_page(
+        self,
+        destination_type: Optional[str] = None,
+        limit: int = 20,
+        sort: Optional[str] = None,
+        **price_filters,
+    ) -> List:
+        # A sorted page needs every match, not the first ``limit`` found
+        rows = self.filter_destinations(destination_type, limit=None if sort else limit, **price_filters)
+        return _take(self.destinations.objects, _sort_destinations(self.destinations, rows, sort, limit))
+
+    def search_destinations(
+        self,
+        query: Optional[str],
+        destination_type: Optional[str] = None,
+        min_rating: Optional[float] = None,
+        limit: int = 20,
+        sort: Optional[str] = None,
+        **price_filters,
+    ) -> List:
+        rows = self.filter_destinations(
+            destination_type, min_rating, query, None if sort else limit, **price_filters
+        )
+        return _take(self.destinations.objects, _sort_destinations(self.destinations, rows, sort, limit))
+
+    def top_destinations(self, k: int = 10, destination_type: Optional[str] = None) -> List:
+        rows = self.filter_destinations(destination_type)
+        return _take(self.destinations.objects, _top_k(self.destinations.rating, rows, k))
+
+    def hotels_page(self, destination_id: Optional[str] = None, limit: int = 20) -> List:
+        table = self.hotels
+        if destination_id:
+            rows = np.flatnonzero(table.destination.codes == table.destination.code(destination_id))
+        else:
+            rows = np.arange(len(table))
+        return _take(table.objects, rows[:limit])
+
+    def stats(self) -> Dict:
+        return {
+            "destinations": len(self.destinations) if self.destinations else 0,
+            "hotels": len(self.hotels) if self.hotels else 0,
+            "array_bytes": (self.destinations.nbytes() if self.destinations else 0)
+            + (self.hotels.nbytes() if self.hotels else 0),
+        }
@@ -0,0 +1,148 @@
+"""Operations CLI for the Travel Booking Platform backend.
+
+Usage (from the backend directory):
+    python cli.py revenue --group-by month --start 2025-01-01
+    python cli.py export bookings.parquet --format parquet
+    python cli.py migrate-prices
+    python cli.py generate --destinations 1000 --hotels 20000 --bookings 1000000 --drop --start 2025-10-01
+"""
+import asyncio
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import typer
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+import analytics
+import datagen
+import pricing
+from catalog_cache import InvalidationBus, LocalCache
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+app = typer.Typer(help="Travel Booking Platform operations")
+
+
+def get_db():
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    return client[os.environ['DB_NAME']]
+
+
+def _parse_date(value: Optional[str]):
+    return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+
+
+def _print(result):
+    typer.echo(json.dumps(result, indent=2, default=str))
+
+
+@app.command()
+def revenue(
+    group_by: str = typer.Option("destination", help="destination, hotel or month"),
+    start: Optional[str] = typer.Option(None, help="Check-in from (YYYY-MM-DD)"),
+    end: Optional[str] = typer.Option(None, help="Check-in before (YYYY-MM-DD)"),
+):
+    """Revenue grouped by destination, hotel or month."""
+    _print(asyncio.run(analytics.revenue(get_db(), group_by, _parse_date(start), _parse_date(end))))
+
+
+@app.command()
+def cancellations(
+    group_by: str = typer.Option("month", help="destination, hotel or month"),
+    start: Optional[str] = typer.Option(None),
+    end: Optional[str] = typer.Option(None),
+):
+    """Cancellation rate grouped by destination, hotel or month."""
+    _print(asyncio.run(analytics.cancellation_rate(get_db(), group_by, _parse_date(start), _parse_date(end))))
+
+
+@app.command("lead-time")
+def lead_time(start: Optional[str] = typer.Option(None), end: Optional[str] = typer.Option(None)):
+    """Lead-time distribution in days."""
+    _print(asyncio.run(analytics.lead_time(get_db(), _parse_date(start), _parse_date(end))))
+
+
+@app.command()
+def occupancy(start: str = typer.Option(...), end: str = typer.Option(...)):
+    """Occupancy rate per hotel over a date window."""
+    _print(asyncio.run(analytics.occupancy(get_db(), _parse_date(start), _parse_date(end))))
+
+
+@app.command()
+def export(
+    output: Path,
+    format: str = typer.Option("parquet", help="parquet or arrow"),
+    start: Optional[str] = typer.Option(None),
+    end: Optional[str] = typer.Option(None),
+    chunk_size: int = typer.Option(50_000, help="Rows per row group / record batch"),
+):
+    """Stream bookings to a Parquet or Arrow IPC file."""
+    async def run():
+        written = 0
+        with output.open("wb") as handle:
+            async for chunk in analytics.export_bookings(
+                get_db(), format, _parse_date(start), _parse_date(end), chunk_size
+            ):
+                handle.write(chunk)
+                written += len(chunk)
+        return written
+
+    typer.echo(f"Wrote {asyncio.run(run())} bytes to {output}")
+
+
+@app.command("migrate-prices")
+def migrate_prices(batch_size: int = typer.Option(1000, help="Destinations per bulk write")):
+    """Backfill price tiers and "from" prices on existing destinations."""
+    async def run():
+        db = get_db()
+        await pricing.ensure_indexes(db)
+        result = await pricing.migrate(db, batch_size)
+        if result["updated"]:
+            # Running workers reload their destination caches and stores
+            await InvalidationBus(LocalCache()).publish(db, "destinations")
+        return result
+
+    _print(asyncio.run(run()))
+
+
+@app.command()
+def generate(
+    destinations: int = typer.Option(1_000, help="Destinations to create"),
+    hotels: int = typer.Option(10_000, help="Hotels, clustered around their destinations"),
+    bookings: int = typer.Option(100_000, help="Bookings, Zipf-distributed over hotels and guests"),
+    seed: int = typer.Option(42, help="Same seed and counts give the same data"),
+    chunk_size: int = typer.Option(10_000, help="Documents per insert_many"),
+    zipf_s: float = typer.Option(1.1, help="Zipf exponent for hotel and guest popularity"),
+    drop: bool = typer.Option(False, help="Empty destinations, hotels and bookings first"),
+    start: Optional[str] = typer.Option(
+        None, help="First check-in date (YYYY-MM-DD); defaults to the first of the month a year ago"
+    ),
+):
+    """Load a deterministic synthetic dataset for scale testing."""
+    def progress(collection: str, inserted: int):
+        if inserted % (chunk_size * 10) == 0:
+            typer.echo(f"{collection}: {inserted}", err=True)
+
+    async def run():
+        db = get_db()
+        counts = await datagen.generate(
+            db, destinations, hotels, bookings, seed, chunk_size, zipf_s, drop, progress, _parse_date(start)
+        )
+        # Running workers reload their catalog caches and stores
+        bus = InvalidationBus(LocalCache())
+        await bus.publish(db, "destinations")
+        await bus.publish(db, "hotels")
+        return counts
+
+    started = datetime.now()
+    _print(asyncio.run(run()))
+    typer.echo(f"Done in {(datetime.now() - started).total_seconds():.1f}s", err=True)
+
+
+if __name__ == "__main__":
+    app()
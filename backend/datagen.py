@@ -0,0 +1,374 @@
+"""Deterministic synthetic catalog and booking data for scale testing.
+
+The same seed, counts and start date always produce the same documents, so
+a benchmark run at 1k, 100k or 10M rows can be reproduced on any machine:
+
+* destinations are spread over real-world regions, each a pure function of
+  ``(seed, index)``;
+* hotels are clustered geographically around their destination, priced by
+  the destination's tier with a log-normal spread;
+* bookings pick hotels (and users) from a Zipf distribution, so a few
+  hotels and guests account for most of the history, as in production.
+
+Dates are laid out from a start date that defaults to the first of the
+month a year ago: stays span the past year and the next, so the lifecycle
+job has both bookings to archive and bookings to keep. The dataset's "now"
+is ``HISTORY_DAYS`` after the start; no booking is created after it. Pass an
+explicit start to reproduce a dataset generated in another month.
+
+Documents come from generators and are written with ``insert_many`` one
+chunk at a time, so memory stays constant however many rows are requested.
+Per-row attributes come from a counter-based hash instead of a shared
+random stream, which lets bookings look up a hotel's destination and price
+without keeping the hotels in memory.
+"""
+import math
+import uuid
+from functools import lru_cache
+from datetime import date, datetime, time, timedelta
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+import numpy as np
+
+import pricing
+
+_MASK64 = (1 << 64) - 1
+
+# One hash stream per attribute keeps attributes of the same row independent
+(
+    _DESTINATION_ID, _HOTEL_ID, _BOOKING_ID,
+    _REGION, _LATITUDE, _LONGITUDE, _TYPE, _NAME_LENGTH, _SUFFIX, _TIER, _RATING, _MONTHS,
+    _HOTEL_PRICE, _HOTEL_RATING, _HOTEL_SPREAD, _HOTEL_LATITUDE, _HOTEL_LONGITUDE,
+    _HOTEL_AMENITIES, _HOTEL_OPENED, _HOTEL_BRAND, _HOTEL_KIND,
+) = range(21)
+_SYLLABLE = 64  # _SYLLABLE + k for the k-th syllable of a name
+_PAIRED = 1 << 16  # second draw of a Gaussian or uuid
+
+# Country, centre latitude/longitude and spread in degrees
+REGIONS = [
+    ("France", 46.6, 2.4, 3.0), ("Italy", 42.8, 12.5, 3.0), ("Spain", 40.2, -3.7, 3.0),
+    ("Switzerland", 46.8, 8.2, 1.0), ("Greece", 38.3, 23.4, 2.0), ("Portugal", 39.6, -8.0, 1.5),
+    ("USA", 39.8, -98.6, 12.0), ("Mexico", 23.6, -102.5, 6.0), ("Peru", -9.2, -75.0, 5.0),
+    ("Brazil", -10.3, -53.2, 10.0), ("Japan", 36.2, 138.3, 4.0), ("Thailand", 15.9, 100.9, 4.0),
+    ("Indonesia", -2.5, 118.0, 8.0), ("India", 21.1, 78.0, 8.0), ("UAE", 24.3, 54.4, 1.0),
+    ("Maldives", 3.2, 73.2, 1.0), ("Kenya", 0.2, 37.9, 3.0), ("Morocco", 31.8, -7.1, 3.0),
+    ("Australia", -25.3, 133.8, 10.0), ("New Zealand", -41.3, 174.0, 3.0), ("Iceland", 64.9, -18.6, 1.5),
+    ("Norway", 64.5, 11.5, 4.0), ("Vietnam", 14.1, 108.3, 4.0), ("South Africa", -30.6, 22.9, 5.0),
+]
+
+ACTIVITIES = {
+    "beach": ["Snorkeling", "Diving", "Surfing", "Sunset cruise", "Beach volleyball"],
+    "mountain": ["Hiking", "Skiing", "Paragliding", "Mountain biking", "Cable car rides"],
+    "city": ["Museums", "Food tours", "Nightlife", "Shopping", "Architecture walks"],
+    "adventure": ["Rafting", "Zip-lining", "Rock climbing", "Safari", "Canyoning"],
+    "cultural": ["Temple visits", "Cooking classes", "Historic sites", "Local markets", "Festivals"],
+    "nature": ["Wildlife watching", "Kayaking", "Bird watching", "Waterfalls", "National parks"],
+}
+DESTINATION_TYPES = list(ACTIVITIES)
+HOTEL_BRANDS = ["Grand", "Royal", "Boutique", "Harbour", "Garden", "Summit"]
+HOTEL_KINDS = ["Hotel", "Resort", "Lodge", "Suites", "Inn"]
+AMENITIES = ["WiFi", "Pool", "Spa", "Gym", "Restaurant", "Bar", "Parking", "Airport shuttle", "Beach access"]
+MONTHS = ["January", "February", "March", "April", "May", "June",
+          "July", "August", "September", "October", "November", "December"]
+SYLLABLES = ["ka", "lo", "ma", "ri", "sa", "ne", "ta", "vi", "po", "lu", "be", "do", "ra", "mi", "zo", "an", "el", "or"]
+SUFFIXES = ["", " Bay", " Heights", " Springs", " Coast", " Valley", " Old Town", " Island", " Peaks"]
+NIGHTLY_BASE = {1: 60.0, 2: 120.0, 3: 250.0, 4: 520.0}
+
+# Booking statuses and their cumulative probabilities
+STATUSES = [("confirmed", 0.72), ("cancelled", 0.88), ("pending", 0.95), ("expired", 1.0)]
+
+BOOKING_DAYS = 730
+HISTORY_DAYS = 365
+HOTEL_OPENING_DAYS = 180
+
+
+def default_start(today: Optional[date] = None) -> date:
+    """First of the month a year before ``today``."""
+    today = today or date.today()
+    return date(today.year - 1, today.month, 1)
+
+
+def _mix(x: int) -> int:
+    """splitmix64 finalizer."""
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+def _bits(seed: int, stream: int, index: int) -> int:
+    return _mix((_mix(((seed << 32) ^ stream) & _MASK64) + index * 0x9E3779B97F4A7C15) & _MASK64)
+
+
+def _unit(seed: int, stream: int, index: int) -> float:
+    """Uniform [0, 1) value for ``(seed, stream, index)``."""
+    return (_bits(seed, stream, index) >> 11) / float(1 << 53)
+
+
+def _gauss(seed: int, stream: int, index: int) -> float:
+    u1 = _unit(seed, stream, index) or 1e-12
+    u2 = _unit(seed, stream + _PAIRED, index)
+    return math.sqrt(-2.0 * math.log(u1)) * math.cos(2.0 * math.pi * u2)
+
+
+def _uuid(seed: int, stream: int, index: int) -> str:
+    value = _bits(seed, stream, index) << 64 | _bits(seed, stream + _PAIRED, index)
+    return str(uuid.UUID(int=value, version=4))
+
+
+def destination_id(seed: int, index: int) -> str:
+    return _uuid(seed, _DESTINATION_ID, index)
+
+
+def hotel_id(seed: int, index: int) -> str:
+    return _uuid(seed, _HOTEL_ID, index)
+
+
+def _pick(values, u: float):
+    return values[int(u * len(values))]
+
+
+def _destination_tier(seed: int, index: int) -> int:
+    return 1 + int(_unit(seed, _TIER, index) * 4)
+
+
+def _destination_location(seed: int, index: int):
+    _, latitude, longitude, spread = _pick(REGIONS, _unit(seed, _REGION, index))
+    return (
+        max(-85.0, min(85.0, latitude + _gauss(seed, _LATITUDE, index) * spread / 2)),
+        (longitude + _gauss(seed, _LONGITUDE, index) * spread / 2 + 180.0) % 360.0 - 180.0,
+    )
+
+
+def make_destination(seed: int, index: int, start: date) -> Dict:
+    country = _pick(REGIONS, _unit(seed, _REGION, index))[0]
+    latitude, longitude = _destination_location(seed, index)
+    destination_type = _pick(DESTINATION_TYPES, _unit(seed, _TYPE, index))
+    syllables = 2 + int(_unit(seed, _NAME_LENGTH, index) * 3)
+    name = "".join(_pick(SYLLABLES, _unit(seed, _SYLLABLE + k, index)) for k in range(syllables))
+    name = name.title() + _pick(SUFFIXES, _unit(seed, _SUFFIX, index))
+    tier = _destination_tier(seed, index)
+    activities = ACTIVITIES[destination_type]
+    first_month = int(_unit(seed, _MONTHS, index) * 12)
+    return {
+        "id": destination_id(seed, index),
+        "name": name,
+        "country": country,
+        "description": f"A {destination_type} destination in {country}, known for "
+                       f"{activities[0].lower()} and {activities[1].lower()}",
+        "type": destination_type,
+        "price_range": "$" * tier,
+        "price_tier": tier,
+        "rating": round(3.0 + 2.0 * math.sqrt(_unit(seed, _RATING, index)), 1),
+        "image_url": f"https://picsum.photos/seed/destination-{index}/800/600",
+        "latitude": round(latitude, 6),
+        "longitude": round(longitude, 6),
+        "popular_activities": activities[: 2 + index % 3],
+        "best_months": [MONTHS[(first_month + k) % 12] for k in range(3 + index % 3)],
+        "created_at": datetime.combine(start, time.min) + timedelta(minutes=index),
+    }
+
+
+def hotel_destination(index: int, destinations: int) -> int:
+    return index % destinations
+
+
+def hotel_price(seed: int, index: int, destinations: int) -> float:
+    tier = _destination_tier(seed, hotel_destination(index, destinations))
+    return round(NIGHTLY_BASE[tier] * math.exp(0.35 * _gauss(seed, _HOTEL_PRICE, index)), 2)
+
+
+def hotel_opened(seed: int, index: int) -> int:
+    """Days after the dataset start a hotel becomes available, for ``BOOKING_DAYS``."""
+    return int(_unit(seed, _HOTEL_OPENED, index) * HOTEL_OPENING_DAYS)
+
+
+def make_hotel(seed: int, index: int, destinations: int, start: date) -> Dict:
+    destination = hotel_destination(index, destinations)
+    latitude, longitude = _destination_location(seed, destination)
+    # Hotels sit within a few kilometres of their destination's centre
+    spread = 0.03 + 0.05 * _unit(seed, _HOTEL_SPREAD, index)
+    amenity_mask = int(_unit(seed, _HOTEL_AMENITIES, index) * (1 << len(AMENITIES)))
+    opened = start + timedelta(days=hotel_opened(seed, index))
+    brand = _pick(HOTEL_BRANDS, _unit(seed, _HOTEL_BRAND, index))
+    kind = _pick(HOTEL_KINDS, _unit(seed, _HOTEL_KIND, index))
+    return {
+        "id": hotel_id(seed, index),
+        "name": f"{brand} {kind} {index}",
+        "destination_id": destination_id(seed, destination),
+        "description": "Comfortable rooms close to the main sights",
+        "price_per_night": hotel_price(seed, index, destinations),
+        "rating": round(2.5 + 2.5 * math.sqrt(_unit(seed, _HOTEL_RATING, index)), 1),
+        "amenities": [amenity for bit, amenity in enumerate(AMENITIES) if amenity_mask >> bit & 1] or ["WiFi"],
+        "image_url": f"https://picsum.photos/seed/hotel-{index}/800/600",
+        "latitude": round(latitude + _gauss(seed, _HOTEL_LATITUDE, index) * spread, 6),
+        "longitude": round(longitude + _gauss(seed, _HOTEL_LONGITUDE, index) * spread, 6),
+        "available_from": opened.isoformat(),
+        "available_to": (opened + timedelta(days=BOOKING_DAYS)).isoformat(),
+        "created_at": datetime.combine(start, time.min) + timedelta(seconds=index),
+    }
+
+
+def generate_destinations(count: int, seed: int, start: Optional[date] = None) -> Iterator[Dict]:
+    start = start or default_start()
+    return (make_destination(seed, index, start) for index in range(count))
+
+
+def generate_hotels(count: int, destinations: int, seed: int, start: Optional[date] = None) -> Iterator[Dict]:
+    start = start or default_start()
+    return (make_hotel(seed, index, destinations, start) for index in range(count))
+
+
+def _zipf_ranks(u: np.ndarray, n: int, s: float) -> np.ndarray:
+    """Ranks in ``[0, n)`` with P(rank k) roughly proportional to 1/(k+1)^s."""
+    if abs(s - 1.0) < 1e-9:
+        ranks = np.exp(u * math.log(n + 1)) - 1
+    else:
+        ranks = ((((n + 1) ** (1 - s)) - 1) * u + 1) ** (1 / (1 - s)) - 1
+    return np.minimum(ranks.astype(np.int64), n - 1)
+
+
+@lru_cache(maxsize=1 << 16)
+def _booked_hotel(seed: int, index: int, destinations: int):
+    """Hotel id, destination id, nightly price and opening day; Zipf keeps the hit rate high."""
+    return (
+        hotel_id(seed, index),
+        destination_id(seed, hotel_destination(index, destinations)),
+        hotel_price(seed, index, destinations),
+        hotel_opened(seed, index),
+    )
+
+
+# Scatters Zipf ranks over ids so popularity is not tied to insertion order
+_SCATTER = 2_147_483_647
+
+
+def generate_bookings(
+    count: int,
+    hotels: int,
+    destinations: int,
+    seed: int,
+    zipf_s: float = 1.1,
+    start: Optional[date] = None,
+    days: int = BOOKING_DAYS,
+    block: int = 10_000,
+) -> Iterator[Dict]:
+    """Bookings whose hotels and guests follow a Zipf distribution.
+
+    Stays fall in the ``days`` from ``start`` (``default_start()`` when
+    omitted) and inside their hotel's availability. Bookings are created
+    before check-in and no later than ``HISTORY_DAYS`` after ``start``.
+    Random draws are made ``block`` rows at a time from a generator seeded
+    with ``(seed, block index)``, so output depends only on the arguments.
+    """
+    start = start or default_start()
+    now = datetime.combine(start + timedelta(days=HISTORY_DAYS), time.min)
+    users = max(1, count // 4)
+    for first in range(0, count, block):
+        size = min(block, count - first)
+        rng = np.random.default_rng([seed, first // block])
+        u = rng.random((7, size))
+        hotel_rows = (_zipf_ranks(u[0], hotels, zipf_s) * _SCATTER % hotels).tolist()
+        user_rows = (_zipf_ranks(u[1], users, zipf_s) * _SCATTER % users).tolist()
+        check_in_draws = u[2].tolist()
+        nights = (1 + np.floor(-np.log1p(-u[3]) * 3)).clip(1, 21).astype(np.int64).tolist()
+        lead_days = np.floor(-np.log1p(-u[4]) * 30).clip(0, 365).astype(np.int64).tolist()
+        guests = (1 + u[5] * 4).astype(np.int64).tolist()
+        status_draws = u[6].tolist()
+
+        for offset in range(size):
+            index = first + offset
+            booked_hotel_id, booked_destination_id, nightly, opened = _booked_hotel(
+                seed, hotel_rows[offset], destinations
+            )
+            user = user_rows[offset]
+            # Whole stay inside both the window and the hotel's availability
+            first = max(0, opened)
+            last = min(days, opened + BOOKING_DAYS) - nights[offset]
+            check_in = start + timedelta(days=first + int(check_in_draws[offset] * max(last - first, 1)))
+            check_out = check_in + timedelta(days=nights[offset])
+            rooms = (guests[offset] + 1) // 2
+            status = next(name for name, cumulative in STATUSES if status_draws[offset] < cumulative)
+            yield {
+                "id": _uuid(seed, _BOOKING_ID, index),
+                "user_name": f"Guest {user}",
+                "user_email": f"guest{user}@example.com",
+                "destination_id": booked_destination_id,
+                "hotel_id": booked_hotel_id,
+                "check_in": check_in.isoformat(),
+                "check_out": check_out.isoformat(),
+                "guests": guests[offset],
+                "total_price": round(nightly * nights[offset] * rooms, 2),
+                "status": status,
+                "special_requests": None,
+                # Stays after "now" were booked at least that far ahead
+                "created_at": min(datetime.combine(check_in, time.min), now)
+                - timedelta(days=lead_days[offset], seconds=int(status_draws[offset] * 86400)),
+            }
+
+
+async def insert_stream(
+    collection,
+    documents: Iterable[Dict],
+    chunk_size: int = 10_000,
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """Insert ``documents`` in unordered ``insert_many`` chunks; returns the count."""
+    iterator = iter(documents)
+    inserted = 0
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return inserted
+        await collection.insert_many(chunk, ordered=False)
+        inserted += len(chunk)
+        if progress:
+            progress(inserted)
+
+
+async def generate(
+    db,
+    destinations: int,
+    hotels: int,
+    bookings: int,
+    seed: int = 42,
+    chunk_size: int = 10_000,
+    zipf_s: float = 1.1,
+    drop: bool = False,
+    progress: Optional[Callable[[str, int], None]] = None,
+    start: Optional[date] = None,
+) -> Dict[str, int]:
+    """Write a synthetic dataset to ``db`` and backfill destination from prices.
+
+    With ``drop`` the destinations, hotels and bookings collections are
+    emptied first; otherwise rows are appended, and re-running with the same
+    seed would duplicate ids. ``start`` anchors every date in the dataset.
+    """
+    start = start or default_start()
+    if destinations < 1 or (bookings and hotels < 1):
+        raise ValueError("Bookings need at least one destination and one hotel")
+    if drop:
+        for name in ("destinations", "hotels", "bookings"):
+            await db[name].drop()
+
+    def report(collection: str):
+        return (lambda inserted: progress(collection, inserted)) if progress else None
+
+    counts = {
+        "destinations": await insert_stream(
+            db.destinations, generate_destinations(destinations, seed, start), chunk_size, report("destinations")
+        ),
+        "hotels": await insert_stream(
+            db.hotels, generate_hotels(hotels, destinations, seed, start), chunk_size, report("hotels")
+        ),
+        "bookings": await insert_stream(
+            db.bookings,
+            generate_bookings(bookings, hotels, destinations, seed, zipf_s, start),
+            chunk_size,
+            report("bookings"),
+        ),
+    }
+    # Index the hotel prices before the backfill aggregates over them
+    await pricing.ensure_indexes(db)
+    await pricing.migrate(db, batch_size=min(chunk_size, 1000))
+    return counts
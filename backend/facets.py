@@ -0,0 +1,95 @@
+"""Faceted destination browsing in a single ``$facet`` aggregation.
+
+One round-trip returns the filtered result page, its total, and counts for
+the type, price range and rating facets. Facet counts are disjunctive: each
+facet is counted with every active filter except its own, so the UI can show
+how many results picking a different value of that facet would give.
+"""
+from typing import Dict, List, Optional
+
+# Lower bounds of the rating buckets; the last boundary closes the range.
+# Counts are reported cumulatively ("4+" includes 4.5+) to match min_rating.
+RATING_BOUNDARIES = [0, 3, 3.5, 4, 4.5, 5.01]
+RATING_THRESHOLDS = [4.5, 4, 3.5, 3]
+
+
+def _filters(destination_type: Optional[str], price_range: Optional[str], min_rating: Optional[float]) -> Dict:
+    filters = {}
+    if destination_type:
+        filters["type"] = destination_type
+    if price_range:
+        filters["price_range"] = price_range
+    if min_rating is not None:
+        filters["rating"] = {"$gte": min_rating}
+    return filters
+
+
+def _without(filters: Dict, field: str) -> Dict:
+    return {key: value for key, value in filters.items() if key != field}
+
+
+def facet_pipeline(
+    destination_type: Optional[str] = None,
+    price_range: Optional[str] = None,
+    min_rating: Optional[float] = None,
+    skip: int = 0,
+    limit: int = 20,
+) -> List[Dict]:
+    filters = _filters(destination_type, price_range, min_rating)
+    return [{"$facet": {
+        "results": [
+            {"$match": filters},
+            {"$sort": {"rating": -1, "id": 1}},
+            {"$skip": skip},
+            {"$limit": limit},
+            {"$project": {"_id": 0}},
+        ],
+        "total": [{"$match": filters}, {"$count": "count"}],
+        "type": [
+            {"$match": _without(filters, "type")},
+            {"$group": {"_id": "$type", "count": {"$sum": 1}}},
+            {"$sort": {"_id": 1}},
+        ],
+        "price_range": [
+            {"$match": _without(filters, "price_range")},
+            {"$group": {"_id": "$price_range", "count": {"$sum": 1}}},
+            {"$sort": {"_id": 1}},
+        ],
+        "rating": [
+            {"$match": _without(filters, "rating")},
+            {"$bucket": {
+                "groupBy": "$rating",
+                "boundaries": RATING_BOUNDARIES,
+                "default": "other",
+                "output": {"count": {"$sum": 1}},
+            }},
+        ],
+    }}]
+
+
+def _cumulative_ratings(buckets: List[Dict]) -> List[Dict]:
+    counts = {row["_id"]: row["count"] for row in buckets}
+    facet = []
+    running = 0
+    for threshold in RATING_THRESHOLDS:
+        running += counts.get(threshold, 0)
+        facet.append({"value": f"{threshold:g}+", "min_rating": threshold, "count": running})
+    return facet
+
+
+def parse_facet_result(result: Dict) -> Dict:
+    total = result["total"][0]["count"] if result["total"] else 0
+    return {
+        "results": result["results"],
+        "total": total,
+        "facets": {
+            "type": [{"value": row["_id"], "count": row["count"]} for row in result["type"]],
+            "price_range": [{"value": row["_id"], "count": row["count"]} for row in result["price_range"]],
+            "rating": _cumulative_ratings(result["rating"]),
+        },
+    }
+
+
+async def destination_facets(db, **kwargs) -> Dict:
+    result = await db.destinations.aggregate(facet_pipeline(**kwargs)).to_list(1)
+    return parse_facet_result(result[0])
@@ -0,0 +1,234 @@
+"""Booking lifecycle: expiry of abandoned bookings and monthly archival.
+
+A background scheduler (one leader across all workers, elected through a
+lease document) periodically
+
+* expires ``PENDING`` bookings older than the pending TTL, in batches;
+* moves finished stays whose check-out is more than N months old out of the
+  hot ``bookings`` collection into ``bookings_archive_YYYY_MM`` collections.
+
+A small locator collection maps archived booking ids (and user emails) to
+their archive, so reads fall through to the archive without scanning every
+month. The hot collection and its indexes only ever hold recent and upcoming
+bookings, regardless of how much history accumulates.
+"""
+import asyncio
+import logging
+import os
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from pymongo import ASCENDING, DESCENDING, ReplaceOne
+from pymongo.errors import BulkWriteError, OperationFailure, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_PREFIX = "bookings_archive_"
+LOCATOR_COLLECTION = "booking_archive_locator"
+LEASE_COLLECTION = "scheduler_leases"
+DUPLICATE_KEY = 11000
+# Serves lookups by id while duplicate ids keep the unique index from building
+FALLBACK_ID_INDEX = [("id", ASCENDING), ("_id", ASCENDING)]
+# Fields of an expired booking passed to listeners
+EXPIRY_FIELDS = {"_id": 0, "id": 1, "destination_id": 1, "hotel_id": 1, "status": 1, "check_in": 1, "check_out": 1}
+
+ExpiryListener = Callable[[List[Dict]], Awaitable[None]]
+
+
+def archive_name(check_in: str) -> str:
+    """Archive collection for a booking, partitioned by check-in month."""
+    return ARCHIVE_PREFIX + check_in[:7].replace("-", "_")
+
+
+def _months_before(day: date, months: int) -> date:
+    month_index = day.year * 12 + day.month - 1 - months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+class BookingLifecycle:
+    def __init__(
+        self,
+        db,
+        pending_ttl: timedelta = timedelta(hours=48),
+        archive_after_months: int = 6,
+        batch_size: int = 1000,
+        interval_seconds: float = 300.0,
+    ):
+        self.db = db
+        self.pending_ttl = pending_ttl
+        self.archive_after_months = archive_after_months
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+        self.owner = f"{os.getpid()}-{uuid.uuid4()}"
+        self._task: Optional[asyncio.Task] = None
+        self._expiry_listeners: List[ExpiryListener] = []
+
+    def subscribe(self, listener: ExpiryListener) -> None:
+        """Register ``await listener(bookings)`` for every batch of expired bookings."""
+        self._expiry_listeners.append(listener)
+
+    async def ensure_indexes(self) -> None:
+        await self._ensure_id_index()
+        await self.db.bookings.create_index("user_email")
+        await self.db.bookings.create_index([("status", ASCENDING), ("created_at", ASCENDING)])
+        await self.db.bookings.create_index("check_out")
+        await self.db[LOCATOR_COLLECTION].create_index([("user_email", ASCENDING), ("archive", DESCENDING)])
+
+    async def _ensure_id_index(self) -> None:
+        try:
+            await self.db.bookings.create_index("id", unique=True)
+        except OperationFailure as error:
+            if error.code != DUPLICATE_KEY:
+                raise
+            # E.g. a generated dataset loaded twice without --drop
+            logger.error("Bookings share ids; indexing id without uniqueness until the duplicates are removed")
+            await self.db.bookings.create_index(FALLBACK_ID_INDEX)
+            return
+        fallback = "_".join(f"{key}_{direction}" for key, direction in FALLBACK_ID_INDEX)
+        if fallback in await self.db.bookings.index_information():
+            await self.db.bookings.drop_index(fallback)
+
+    async def expire_pending(self, now: Optional[datetime] = None) -> int:
+        """Mark ``PENDING`` bookings older than the TTL as ``EXPIRED``."""
+        cutoff = (now or datetime.utcnow()) - self.pending_ttl
+        expired = 0
+        while True:
+            batch = await self.db.bookings.find(
+                {"status": "pending", "created_at": {"$lt": cutoff}},
+                {"_id": 0, "id": 1},
+            ).limit(self.batch_size).to_list(self.batch_size)
+            if not batch:
+                return expired
+            ids = [booking["id"] for booking in batch]
+            # Stamped per batch so only bookings this run expired are reported,
+            # not ones confirmed or cancelled since they were read
+            expired_at = datetime.utcnow().replace(microsecond=0)
+            result = await self.db.bookings.update_many(
+                {"id": {"$in": ids}, "status": "pending"},
+                {"$set": {"status": "expired", "expired_at": expired_at}},
+            )
+            expired += result.modified_count
+            if self._expiry_listeners and result.modified_count:
+                bookings = await self.db.bookings.find(
+                    {"id": {"$in": ids}, "status": "expired", "expired_at": expired_at}, EXPIRY_FIELDS
+                ).to_list(None)
+                for listener in self._expiry_listeners:
+                    try:
+                        await listener(bookings)
+                    except Exception:
+                        logger.exception("Booking expiry listener failed")
+
+    async def archive_completed(self, today: Optional[date] = None) -> int:
+        """Move bookings checked out before the archive cutoff into monthly archives."""
+        cutoff = _months_before(today or date.today(), self.archive_after_months).isoformat()
+        archived = 0
+        while True:
+            batch = await self.db.bookings.find(
+                {"check_out": {"$lt": cutoff}, "status": {"$ne": "pending"}},
+                {"_id": 0},
+            ).sort("check_out", ASCENDING).limit(self.batch_size).to_list(self.batch_size)
+            if not batch:
+                return archived
+
+            by_archive: Dict[str, List[Dict]] = {}
+            for booking in batch:
+                by_archive.setdefault(archive_name(booking["check_in"]), []).append(booking)
+            for name, bookings in by_archive.items():
+                await self._ensure_archive(name)
+                # Copy first, then delete: a crash in between leaves a copy that
+                # the next run overwrites
+                await self.db[name].bulk_write(
+                    [ReplaceOne({"id": booking["id"]}, booking, upsert=True) for booking in bookings],
+                    ordered=False,
+                )
+                await self._insert_ignoring_duplicates(self.db[LOCATOR_COLLECTION], [
+                    {"_id": booking["id"], "archive": name, "user_email": booking["user_email"]}
+                    for booking in bookings
+                ])
+            # Only delete bookings still in the state that was copied; one whose
+            # status changed meanwhile stays and is copied again next batch
+            by_status: Dict[str, List[str]] = {}
+            for booking in batch:
+                by_status.setdefault(booking["status"], []).append(booking["id"])
+            result = await self.db.bookings.delete_many({"$or": [
+                {"id": {"$in": ids}, "status": status} for status, ids in by_status.items()
+            ]})
+            archived += result.deleted_count
+
+    async def _ensure_archive(self, name: str) -> None:
+        await self.db[name].create_index("id", unique=True)
+        await self.db[name].create_index("user_email")
+
+    @staticmethod
+    async def _insert_ignoring_duplicates(collection, documents: List[Dict]) -> None:
+        try:
+            await collection.insert_many(documents, ordered=False)
+        except BulkWriteError as error:
+            if any(e["code"] != DUPLICATE_KEY for e in error.details.get("writeErrors", [])):
+                raise
+
+    async def find_archived(self, booking_id: str) -> Optional[Dict]:
+        location = await self.db[LOCATOR_COLLECTION].find_one({"_id": booking_id})
+        if not location:
+            return None
+        return await self.db[location["archive"]].find_one({"id": booking_id}, {"_id": 0})
+
+    async def find_archived_for_user(self, user_email: str, limit: int) -> List[Dict]:
+        """Most recent archived bookings of one user, newest archive first."""
+        locations = await self.db[LOCATOR_COLLECTION].find(
+            {"user_email": user_email}
+        ).sort("archive", DESCENDING).limit(limit).to_list(limit)
+        by_archive: Dict[str, List[str]] = {}
+        for location in locations:
+            by_archive.setdefault(location["archive"], []).append(location["_id"])
+        bookings = []
+        for name in sorted(by_archive, reverse=True):
+            bookings.extend(await self.db[name].find({"id": {"$in": by_archive[name]}}, {"_id": 0}).to_list(None))
+        return bookings
+
+    async def _acquire_lease(self, name: str) -> bool:
+        """Hold the scheduler lease so only one worker runs maintenance."""
+        now = datetime.utcnow()
+        try:
+            lease = await self.db[LEASE_COLLECTION].find_one_and_update(
+                {"_id": name, "$or": [{"owner": self.owner}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"owner": self.owner, "expires_at": now + timedelta(seconds=self.interval_seconds * 2)}},
+                upsert=True,
+                return_document=True,
+            )
+        except PyMongoError as error:
+            # Another worker holds a live lease, so the upsert hit the _id index
+            if getattr(error, "code", None) == DUPLICATE_KEY:
+                return False
+            raise
+        return lease is not None and lease.get("owner") == self.owner
+
+    async def run_once(self) -> Dict:
+        expired = await self.expire_pending()
+        archived = await self.archive_completed()
+        if expired or archived:
+            logger.info(f"Booking lifecycle: expired {expired}, archived {archived}")
+        return {"expired": expired, "archived": archived}
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if await self._acquire_lease("booking_lifecycle"):
+                    await self.run_once()
+            except PyMongoError:
+                logger.exception("Booking lifecycle run failed")
+            await asyncio.sleep(self.interval_seconds)
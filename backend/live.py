@@ -0,0 +1,265 @@
+"""Live availability and price updates pushed over WebSocket or SSE.
+
+Clients subscribe to topics such as ``hotel:<id>`` or ``destination:<id>``
+instead of polling. Each topic with subscribers owns one fan-out task that
+copies published events into every subscriber's bounded buffer. A subscriber
+whose buffer is full is a slow consumer: it is dropped (told so, then
+disconnected) rather than allowed to grow memory or hold up the others.
+
+An idle connection costs one ``Subscriber`` (a small bounded queue) plus the
+handler coroutine parked on it, so thousands of idle clients stay cheap.
+Catalog and booking changes go through a ``LiveRelay``: a capped collection
+that every worker tails, so subscribers see them whichever worker handled the
+write, whether the invalidation bus runs on change streams or polling.
+"""
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+DROPPED = {"type": "dropped", "reason": "slow consumer"}
+EVENTS_COLLECTION = "live_events"
+MAX_TOPIC_LENGTH = 128
+
+
+def destination_topic(destination_id: str) -> str:
+    return f"destination:{destination_id}"
+
+
+def hotel_topic(hotel_id: str) -> str:
+    return f"hotel:{hotel_id}"
+
+
+def parse_subscription(message) -> Tuple[List[str], List[str]]:
+    """Topics to subscribe and unsubscribe from a WebSocket client message.
+
+    Raises ``ValueError`` unless ``message`` is an object whose ``subscribe``
+    and ``unsubscribe`` keys, when present, are lists of topic strings.
+    """
+    if not isinstance(message, dict):
+        raise ValueError("Expected a JSON object")
+    lists = []
+    for key in ("subscribe", "unsubscribe"):
+        topics = message.get(key) or []
+        if not isinstance(topics, list) or not all(
+            isinstance(topic, str) and 0 < len(topic) <= MAX_TOPIC_LENGTH for topic in topics
+        ):
+            raise ValueError(f"'{key}' must be a list of topic strings")
+        lists.append(topics)
+    return lists[0], lists[1]
+
+
+class Subscriber:
+    def __init__(self, buffer_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        self.topics: Set[str] = set()
+        self.dropped = False
+
+    def offer(self, message: Dict) -> bool:
+        """Buffer ``message``; on overflow drop the subscriber and return False."""
+        if self.dropped:
+            return False
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            self.dropped = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(DROPPED)
+            return False
+
+    async def next(self, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Next message, or ``None`` if nothing arrived within ``timeout``."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class _Topic:
+    def __init__(self, name: str, hub: "LiveHub"):
+        self.name = name
+        self.hub = hub
+        self.subscribers: Set[Subscriber] = set()
+        self.inbox: asyncio.Queue = asyncio.Queue(maxsize=hub.topic_backlog)
+        self.task: Optional[asyncio.Task] = None
+
+    def ensure_running(self) -> None:
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._fan_out())
+
+    async def _fan_out(self) -> None:
+        while self.subscribers:
+            message = await self.inbox.get()
+            for subscriber in list(self.subscribers):
+                if not subscriber.offer(message):
+                    self.hub.dropped += 1
+                    self.hub.unsubscribe(subscriber)
+
+
+class LiveHub:
+    def __init__(self, buffer_size: int = 32, topic_backlog: int = 1024, max_topics: int = 50):
+        self.buffer_size = buffer_size
+        self.topic_backlog = topic_backlog
+        self.max_topics = max_topics
+        self._topics: Dict[str, _Topic] = {}
+        self.connections = 0
+        self.published = 0
+        self.dropped = 0
+
+    def connect(self) -> Subscriber:
+        self.connections += 1
+        return Subscriber(self.buffer_size)
+
+    def disconnect(self, subscriber: Subscriber) -> None:
+        self.connections -= 1
+        self.unsubscribe(subscriber)
+
+    def subscribe(self, subscriber: Subscriber, topics: Iterable[str]) -> List[str]:
+        """Subscribe up to ``max_topics`` in total; returns the topics refused."""
+        refused = []
+        for name in topics:
+            if name in subscriber.topics:
+                continue
+            if len(subscriber.topics) >= self.max_topics:
+                refused.append(name)
+                continue
+            topic = self._topics.get(name)
+            if topic is None:
+                topic = self._topics[name] = _Topic(name, self)
+            topic.subscribers.add(subscriber)
+            subscriber.topics.add(name)
+            topic.ensure_running()
+        return refused
+
+    def unsubscribe(self, subscriber: Subscriber, topics: Optional[Iterable[str]] = None) -> None:
+        for name in list(topics if topics is not None else subscriber.topics):
+            subscriber.topics.discard(name)
+            topic = self._topics.get(name)
+            if topic is None:
+                continue
+            topic.subscribers.discard(subscriber)
+            if not topic.subscribers:
+                if topic.task is not None:
+                    topic.task.cancel()
+                del self._topics[name]
+
+    def publish(self, topic_name: str, event: Dict) -> None:
+        """Queue ``event`` for ``topic_name``; a no-op when nobody listens."""
+        topic = self._topics.get(topic_name)
+        if topic is None:
+            return
+        message = dict(event, topic=topic_name)
+        try:
+            topic.inbox.put_nowait(message)
+            self.published += 1
+        except asyncio.QueueFull:
+            logger.warning(f"Live topic {topic_name} backlog full, event dropped")
+
+    def stats(self) -> Dict:
+        return {
+            "connections": self.connections,
+            "topics": len(self._topics),
+            "subscriptions": sum(len(topic.subscribers) for topic in self._topics.values()),
+            "published": self.published,
+            "dropped_consumers": self.dropped,
+            "rss_bytes": process_rss_bytes(),
+        }
+
+
+class LiveRelay:
+    """Delivers events to the ``LiveHub`` of every worker via a capped collection.
+
+    Writers insert into ``live_events``; each worker follows it with a
+    tailable cursor and publishes what it reads into its own hub. Capped
+    collections and tailable cursors work on standalone mongod as well as
+    replica sets, and old events age out on their own.
+    """
+
+    def __init__(self, hub: LiveHub, size_bytes: int = 8 * 2**20, retry_interval: float = 1.0):
+        self.hub = hub
+        self.size_bytes = size_bytes
+        self.retry_interval = retry_interval
+        self.relayed = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def ensure_collection(self, db) -> None:
+        try:
+            await db.create_collection(EVENTS_COLLECTION, capped=True, size=self.size_bytes)
+        except CollectionInvalid:
+            pass
+        # A tailable cursor on an empty capped collection dies at once
+        if not await db[EVENTS_COLLECTION].find_one({}, {"_id": 1}):
+            await db[EVENTS_COLLECTION].insert_one({"topics": [], "event": None, "at": datetime.utcnow()})
+
+    async def publish(self, db, events: List[Tuple[List[str], Dict]]) -> None:
+        """Send ``(topics, event)`` pairs to every worker's hub."""
+        now = datetime.utcnow()
+        await db[EVENTS_COLLECTION].insert_many(
+            [{"topics": topics, "event": event, "at": now} for topics, event in events]
+        )
+
+    def deliver(self, document: Dict) -> None:
+        for topic in document.get("topics", []):
+            self.hub.publish(topic, document["event"])
+        self.relayed += 1
+
+    def start(self, db) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, db) -> None:
+        resume_from = None
+        while True:
+            try:
+                if resume_from is None:
+                    # Start after the newest event; history is not replayed
+                    resume_from = await db[EVENTS_COLLECTION].find_one({}, sort=[("$natural", -1)])
+                # Unfiltered, so the cursor stays alive while the collection
+                # is idle; events up to the resume point are skipped
+                caught_up = resume_from is None
+                cursor = db[EVENTS_COLLECTION].find({}, cursor_type=CursorType.TAILABLE_AWAIT)
+                while cursor.alive:
+                    async for document in cursor:
+                        if not caught_up:
+                            caught_up = document["_id"] == resume_from["_id"] or document["at"] > resume_from["at"]
+                            if not caught_up or document["_id"] == resume_from["_id"]:
+                                continue
+                        resume_from = document
+                        if document.get("event") is not None:
+                            self.deliver(document)
+            except PyMongoError:
+                logger.exception("Live event relay failed, retrying")
+            await asyncio.sleep(self.retry_interval)
+
+
+def process_rss_bytes() -> Optional[int]:
+    """Current resident set size of this process (Linux only)."""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def sse_format(message: Dict) -> str:
+    return f"event: {message['type']}\ndata: {json.dumps(message, default=str)}\n\n"
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Load test for admission control: booking latency under a search flood.
+
+Measures POST /api/bookings latency on its own, then again while many
+clients flood POST /api/destinations/search, and fails if the booking p99
+degrades beyond the allowed budget. Run it against the server directly (no
+proxy in front), started with ADMISSION_TRUST_PROXY=1, so the X-Forwarded-For
+header spreads the flood across distinct clients (otherwise the token bucket
+alone absorbs it).
+
+    python loadtest_admission.py --base-url http://localhost:8001/api
+"""
+
+import argparse
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import numpy as np
+import requests
+
+
+def percentiles(samples):
+    if not samples:
+        return {}
+    p50, p95, p99 = np.percentile(np.asarray(samples) * 1000, [50, 95, 99])
+    return {"n": len(samples), "p50_ms": round(p50, 1), "p95_ms": round(p95, 1), "p99_ms": round(p99, 1)}
+
+
+def booking_payload(destination_id):
+    check_in = date.today() + timedelta(days=random.randint(7, 180))
+    return {
+        "user_name": "Load Test",
+        "user_email": f"loadtest+{random.randint(0, 10**9)}@example.com",
+        "destination_id": destination_id,
+        "check_in": check_in.isoformat(),
+        "check_out": (check_in + timedelta(days=3)).isoformat(),
+        "guests": 2,
+        "total_price": 600.0,
+    }
+
+
+def measure_bookings(base_url, destination_id, count, workers, client_prefix):
+    latencies = []
+    statuses = Counter()
+
+    def book(i):
+        session = requests.Session()
+        started = time.perf_counter()
+        response = session.post(
+            f"{base_url}/bookings",
+            json=booking_payload(destination_id),
+            headers={"X-Forwarded-For": f"{client_prefix}.{i % 250}"},
+            timeout=30,
+        )
+        return time.perf_counter() - started, response.status_code
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for elapsed, status in pool.map(book, range(count)):
+            statuses[status] += 1
+            if status == 200:
+                latencies.append(elapsed)
+    return latencies, statuses
+
+
+def flood_search(base_url, stop, workers, statuses, lock):
+    def run(worker):
+        session = requests.Session()
+        while not stop.is_set():
+            try:
+                response = session.post(
+                    f"{base_url}/destinations/search",
+                    json={"query": random.choice(["a", "e", "i", "o", "beach", "city"])},
+                    headers={"X-Forwarded-For": f"10.{worker % 250}.{random.randint(0, 250)}.1"},
+                    timeout=30,
+                )
+                status = response.status_code
+            except requests.RequestException:
+                status = "error"
+            with lock:
+                statuses[status] += 1
+
+    threads = [threading.Thread(target=run, args=(i,), daemon=True) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8001/api")
+    parser.add_argument("--bookings", type=int, default=300)
+    parser.add_argument("--booking-workers", type=int, default=4)
+    parser.add_argument("--flood-workers", type=int, default=200)
+    parser.add_argument("--max-p99-ratio", type=float, default=3.0,
+                        help="Allowed flooded/baseline booking p99 ratio")
+    parser.add_argument("--p99-slack-ms", type=float, default=50.0,
+                        help="Absolute slack added to the allowed p99")
+    args = parser.parse_args()
+
+    destinations = requests.get(f"{args.base_url}/destinations", timeout=30).json()
+    if not destinations:
+        print("No destinations available to book")
+        return 1
+    destination_id = destinations[0]["id"]
+
+    baseline, baseline_statuses = measure_bookings(
+        args.base_url, destination_id, args.bookings, args.booking_workers, "192.168.1"
+    )
+    print(f"Baseline bookings: {percentiles(baseline)} statuses={dict(baseline_statuses)}")
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    flood_statuses = Counter()
+    threads = flood_search(args.base_url, stop, args.flood_workers, flood_statuses, lock)
+    time.sleep(2)  # let the flood saturate the search pool
+    flooded, flooded_statuses = measure_bookings(
+        args.base_url, destination_id, args.bookings, args.booking_workers, "192.168.2"
+    )
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=35)
+
+    print(f"Bookings under flood: {percentiles(flooded)} statuses={dict(flooded_statuses)}")
+    print(f"Search flood statuses: {dict(flood_statuses)}")
+    print(f"Limiter metrics: {requests.get(f'{args.base_url}/admission/metrics', timeout=30).json()}")
+
+    if not baseline or not flooded:
+        print("❌ FAIL: no successful bookings to compare")
+        return 1
+    allowed = percentiles(baseline)["p99_ms"] * args.max_p99_ratio + args.p99_slack_ms
+    actual = percentiles(flooded)["p99_ms"]
+    if actual > allowed or flooded_statuses.get(200, 0) < args.bookings:
+        print(f"❌ FAIL: booking p99 {actual}ms (allowed {allowed:.1f}ms), "
+              f"{args.bookings - flooded_statuses.get(200, 0)} bookings rejected")
+        return 1
+    print(f"✅ PASS: booking p99 {actual}ms within {allowed:.1f}ms under search flood")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
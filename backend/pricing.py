@@ -0,0 +1,143 @@
+"""Numeric destination pricing: price tier and "from" price.
+
+``price_range`` is a display string ("$$$"), which MongoDB can neither range
+filter nor sort meaningfully. Two numeric fields are kept alongside it:
+
+* ``price_tier``: 1-4, the number of currency symbols in ``price_range``;
+* ``from_price``: the lowest ``price_per_night`` among the destination's
+  hotels, absent while it has none.
+
+Both are maintained on write (the tier on destination insert, the from price
+when a hotel is added) and indexed together with ``type`` and ``rating``, so
+price filters and sorts are served by an index instead of the client.
+``migrate`` backfills documents written before these fields existed.
+"""
+import re
+from enum import Enum
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+
+PRICE_TIER_MIN = 1
+PRICE_TIER_MAX = 4
+
+_SYMBOLS = re.compile(r"[$€£¥₹]")
+
+
+class DestinationSort(str, Enum):
+    RATING = "rating"
+    PRICE_ASC = "price_asc"
+    PRICE_DESC = "price_desc"
+
+
+# Destinations without hotels have no from price; like MongoDB, the store
+# orders them before every price ascending and after every price descending
+SORTS: Dict[DestinationSort, List[Tuple[str, int]]] = {
+    DestinationSort.RATING: [("rating", DESCENDING)],
+    DestinationSort.PRICE_ASC: [("from_price", ASCENDING), ("rating", DESCENDING)],
+    DestinationSort.PRICE_DESC: [("from_price", DESCENDING), ("rating", DESCENDING)],
+}
+
+
+def price_tier(price_range) -> Optional[int]:
+    """Tier for a ``price_range`` such as "$$$" or "3"; ``None`` if unparseable."""
+    if price_range is None:
+        return None
+    text = str(price_range).strip()
+    tier = int(text) if text.isdecimal() else len(_SYMBOLS.findall(text))
+    if tier < PRICE_TIER_MIN:
+        return None
+    return min(tier, PRICE_TIER_MAX)
+
+
+def price_filters(
+    min_tier: Optional[int] = None,
+    max_tier: Optional[int] = None,
+    min_from_price: Optional[float] = None,
+    max_from_price: Optional[float] = None,
+) -> Dict:
+    filters = {}
+    tier = {}
+    if min_tier is not None:
+        tier["$gte"] = min_tier
+    if max_tier is not None:
+        tier["$lte"] = max_tier
+    if tier:
+        filters["price_tier"] = tier
+    from_price = {}
+    if min_from_price is not None:
+        from_price["$gte"] = min_from_price
+    if max_from_price is not None:
+        from_price["$lte"] = max_from_price
+    if from_price:
+        filters["from_price"] = from_price
+    return filters
+
+
+async def ensure_indexes(db) -> None:
+    await db.destinations.create_index(
+        [("type", ASCENDING), ("price_tier", ASCENDING), ("rating", DESCENDING)]
+    )
+    await db.destinations.create_index(
+        [("type", ASCENDING), ("from_price", ASCENDING), ("rating", DESCENDING)]
+    )
+    await db.destinations.create_index([("price_tier", ASCENDING), ("rating", DESCENDING)])
+    await db.destinations.create_index([("from_price", ASCENDING), ("rating", DESCENDING)])
+    await db.hotels.create_index([("destination_id", ASCENDING), ("price_per_night", ASCENDING)])
+
+
+async def lower_from_price(db, destination_id: str, price_per_night: float) -> Optional[Dict]:
+    """Record a new hotel price; returns the destination if its from price dropped."""
+    return await db.destinations.find_one_and_update(
+        {
+            "id": destination_id,
+            "$or": [{"from_price": None}, {"from_price": {"$gt": price_per_night}}],
+        },
+        {"$set": {"from_price": price_per_night}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def _from_prices(db, destination_ids: List[str]) -> Dict[str, float]:
+    cursor = db.hotels.aggregate([
+        {"$match": {"destination_id": {"$in": destination_ids}}},
+        {"$group": {"_id": "$destination_id", "from_price": {"$min": "$price_per_night"}}},
+    ])
+    return {row["_id"]: row["from_price"] async for row in cursor}
+
+
+async def migrate(db, batch_size: int = 1000) -> Dict[str, int]:
+    """Backfill ``price_tier`` and ``from_price`` on every destination.
+
+    Walks destinations in ``id`` order one batch at a time and only writes
+    documents whose stored values differ, so it is safe to re-run.
+    """
+    scanned = updated = 0
+    last_id = None
+    while True:
+        query = {"id": {"$gt": last_id}} if last_id is not None else {}
+        batch = await db.destinations.find(
+            query, {"_id": 0, "id": 1, "price_range": 1, "price_tier": 1, "from_price": 1}
+        ).sort("id", ASCENDING).limit(batch_size).to_list(batch_size)
+        if not batch:
+            return {"scanned": scanned, "updated": updated}
+        scanned += len(batch)
+        last_id = batch[-1]["id"]
+
+        from_prices = await _from_prices(db, [destination["id"] for destination in batch])
+        operations = []
+        for destination in batch:
+            tier = price_tier(destination.get("price_range"))
+            from_price = from_prices.get(destination["id"])
+            if destination.get("price_tier") == tier and destination.get("from_price") == from_price:
+                continue
+            update = {"$set": {"price_tier": tier}}
+            if from_price is None:
+                update["$unset"] = {"from_price": ""}
+            else:
+                update["$set"]["from_price"] = from_price
+            operations.append(UpdateOne({"id": destination["id"]}, update))
+        if operations:
+            result = await db.destinations.bulk_write(operations, ordered=False)
+            updated += result.modified_count
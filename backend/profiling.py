@@ -0,0 +1,187 @@
+"""On-demand statistical profiling of individual requests.
+
+A request is profiled when an admin asks for it (``X-Profile: 1`` header or
+``?__profile=1`` together with a valid ``X-Admin-Token``) or when it is picked
+by the configured sample rate. While it runs, a sampler thread looks at the
+event-loop thread every few milliseconds:
+
+* if the loop is executing this request, the live Python stack is recorded
+  (Pydantic model construction, JSON encoding, handler code ...);
+* otherwise the request's suspended coroutine chain is recorded with an
+  ``[awaiting]`` leaf, which is where Motor round-trips and LLM calls show up.
+
+Samples are written in collapsed-stack format (``frame;frame;frame count``),
+readable by flamegraph.pl, speedscope and inferno. When profiling is not
+configured the middleware is not installed at all, so it costs nothing.
+"""
+import asyncio
+import hmac
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+AWAITING = "[awaiting]"
+
+
+def _label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class RequestProfiler:
+    """Samples one asyncio task from a background thread."""
+
+    def __init__(self, task: asyncio.Task, root_frame, interval: float = 0.002):
+        self.task = task
+        self.root_frame = root_frame
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._loop_thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample_loop, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+    def _running_stack(self) -> Optional[List[str]]:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = []
+        while frame is not None:
+            stack.append(_label(frame))
+            if frame is self.root_frame:
+                return stack[::-1]
+            frame = frame.f_back
+        return None
+
+    def _awaiting_stack(self) -> Optional[List[str]]:
+        stack = []
+        inside = False
+        awaitable = self.task.get_coro()
+        while awaitable is not None:
+            frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+            if frame is None:
+                break
+            inside = inside or frame is self.root_frame
+            if inside:
+                stack.append(_label(frame))
+            awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+        if not stack:
+            return None
+        return stack + [AWAITING]
+
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                stack = self._running_stack() or self._awaiting_stack()
+            except Exception:
+                # Frames change under us while the loop runs; drop the sample
+                continue
+            if stack and not self._stop.is_set():
+                self.samples[";".join(stack)] += 1
+
+
+class ProfileStore:
+    """Collapsed-stack profiles on disk, one file per profiled request.
+
+    Only the newest ``max_profiles`` are kept; older ones are deleted on
+    write, so a sample rate left on cannot fill the disk.
+    """
+
+    def __init__(self, output_dir: str = "/tmp/travelhub-profiles", max_profiles: int = 500):
+        self.output_dir = Path(output_dir)
+        self.max_profiles = max_profiles
+
+    def write(self, profile_id: str, samples: Counter) -> None:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        lines = [f"{stack} {count}" for stack, count in samples.most_common()]
+        (self.output_dir / f"{profile_id}.collapsed").write_text("\n".join(lines) + "\n")
+        self.prune()
+
+    def prune(self) -> int:
+        """Delete all but the newest ``max_profiles`` profiles; returns how many went."""
+        paths = sorted(self.output_dir.glob("*.collapsed"), key=lambda path: path.stat().st_mtime_ns)
+        stale = paths[:max(len(paths) - self.max_profiles, 0)]
+        for path in stale:
+            path.unlink(missing_ok=True)
+        return len(stale)
+
+    def list(self) -> List[str]:
+        if not self.output_dir.exists():
+            return []
+        return sorted((path.stem for path in self.output_dir.glob("*.collapsed")), reverse=True)
+
+    def read(self, profile_id: str) -> Optional[str]:
+        if not re.fullmatch(r"[A-Za-z0-9_\-]+", profile_id):
+            return None
+        path = self.output_dir / f"{profile_id}.collapsed"
+        return path.read_text() if path.exists() else None
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles requested or sampled requests."""
+
+    def __init__(
+        self,
+        app,
+        store: ProfileStore,
+        admin_token: Optional[str] = None,
+        sample_rate: float = 0.0,
+        interval: float = 0.002,
+    ):
+        self.app = app
+        self.store = store
+        self.admin_token = admin_token
+        self.sample_rate = sample_rate
+        self.interval = interval
+
+    def _requested(self, scope) -> bool:
+        if not self.admin_token:
+            return False
+        headers = dict(scope.get("headers", []))
+        flagged = headers.get(b"x-profile") == b"1" or b"__profile=1" in scope.get("query_string", b"")
+        if not flagged:
+            return False
+        # Compared as bytes: compare_digest rejects non-ASCII str with TypeError
+        return hmac.compare_digest(headers.get(b"x-admin-token", b""), self.admin_token.encode())
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        requested = self._requested(scope)
+        if not requested and not (self.sample_rate and random.random() < self.sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{scope['method']}-{re.sub(r'[^A-Za-z0-9]+', '_', scope['path']).strip('_')}-{random.randrange(16 ** 6):06x}"
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start" and requested:
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        profiler = RequestProfiler(asyncio.current_task(), sys._getframe(), self.interval)
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            samples = profiler.stop()
+            elapsed = time.perf_counter() - started
+            await asyncio.get_running_loop().run_in_executor(None, self.store.write, profile_id, samples)
+            logger.info(f"Profiled {scope['method']} {scope['path']} in {elapsed * 1000:.1f}ms as {profile_id}")
@@ -1,16 +1,34 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Query
+from fastapi import FastAPI, APIRouter, Header, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
+import hmac
+import json
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
+from pymongo.errors import ExecutionTimeout, OperationFailure, PyMongoError
 from typing import List, Optional
 import uuid
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from enum import Enum
 
+import analytics
+import facets
+import pricing
+from admission import AdmissionController, AdmissionMiddleware, default_rules
+from batch import BatchDispatcher, BatchRequest, BatchResponse
+from profiling import ProfileStore, ProfilingMiddleware
+from catalog_cache import InvalidationBus, LocalCache
+from catalog_store import CatalogStore
+from lifecycle import BookingLifecycle
+from live import DROPPED, LiveHub, LiveRelay, destination_topic, hotel_topic, parse_subscription, sse_format
+from pricing import DestinationSort
+from suggest import PrefixIndex
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
@@ -19,9 +37,126 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+# Per-worker catalog cache, kept in sync with writes from other workers
+catalog_cache = LocalCache(
+    ttl_seconds=float(os.environ.get('CATALOG_CACHE_TTL', '300')),
+    max_queries=int(os.environ.get('CATALOG_CACHE_MAX_QUERIES', '2048'))
+)
+invalidation_bus = InvalidationBus(catalog_cache)
+
+# Typeahead index over destination names, countries and activities
+suggestion_index = PrefixIndex()
+
+def refresh_suggestion_index(collection: str, document: Optional[dict]):
+    if collection == "destinations":
+        suggestion_index.apply_change(db, document)
+
+invalidation_bus.subscribe(refresh_suggestion_index)
+
+# Expiry of abandoned bookings and archival of past stays
+booking_lifecycle = BookingLifecycle(
+    db,
+    pending_ttl=timedelta(hours=float(os.environ.get('BOOKING_PENDING_TTL_HOURS', '48'))),
+    archive_after_months=int(os.environ.get('BOOKING_ARCHIVE_AFTER_MONTHS', '6')),
+    interval_seconds=float(os.environ.get('BOOKING_LIFECYCLE_INTERVAL', '300'))
+)
+
+# Push channel for availability and price changes
+live_hub = LiveHub(
+    buffer_size=int(os.environ.get('LIVE_BUFFER_SIZE', '32')),
+    max_topics=int(os.environ.get('LIVE_MAX_TOPICS', '50'))
+)
+live_relay = LiveRelay(live_hub)
+
+def hotel_event(hotel: dict):
+    event = {
+        "type": "price",
+        "hotel_id": hotel["id"],
+        "destination_id": hotel["destination_id"],
+        "price_per_night": hotel["price_per_night"],
+        "available_from": hotel["available_from"],
+        "available_to": hotel["available_to"]
+    }
+    return [hotel_topic(hotel["id"]), destination_topic(hotel["destination_id"])], event
+
+def destination_event(destination: dict):
+    return [destination_topic(destination["id"])], {
+        "type": "destination",
+        "destination_id": destination["id"],
+        "rating": destination["rating"],
+        "price_range": destination["price_range"],
+        "price_tier": destination.get("price_tier"),
+        "from_price": destination.get("from_price")
+    }
+
+def booking_event(booking: dict):
+    event = {
+        "type": "availability",
+        "booking_id": booking["id"],
+        "destination_id": booking["destination_id"],
+        "hotel_id": booking.get("hotel_id"),
+        "status": booking["status"],
+        "check_in": booking["check_in"],
+        "check_out": booking["check_out"]
+    }
+    topics = [destination_topic(booking["destination_id"])]
+    if booking.get("hotel_id"):
+        topics.append(hotel_topic(booking["hotel_id"]))
+    return topics, event
+
+async def publish_live_events(events: List[tuple]):
+    # Through the relay, so subscribers on every worker see the change
+    try:
+        await live_relay.publish(db, events)
+    except PyMongoError:
+        logger.exception("Publishing live updates failed")
+
+async def publish_booking_updates(bookings: List[dict]):
+    await publish_live_events([booking_event(booking) for booking in bookings])
+
+booking_lifecycle.subscribe(publish_booking_updates)
+
+# Per-route concurrency limits and per-client rate limits
+def trusted_proxy_count(value: str) -> int:
+    """ADMISSION_TRUST_PROXY: proxies appending to X-Forwarded-For ("true" means one).
+
+    Must be set behind the ingress, or every user shares the ingress address.
+    """
+    value = value.strip().lower()
+    if value in ('true', 'yes'):
+        return 1
+    return int(value) if value.isdecimal() else 0
+
+admission_controller = AdmissionController(
+    rules=default_rules(
+        live_rate=float(os.environ.get('ADMISSION_LIVE_RATE', '1')),
+        live_burst=float(os.environ.get('ADMISSION_LIVE_BURST', '10'))
+    ),
+    global_concurrency=int(os.environ.get('ADMISSION_GLOBAL_CONCURRENCY', '64')),
+    trusted_proxies=trusted_proxy_count(os.environ.get('ADMISSION_TRUST_PROXY', ''))
+)
+
+# Opt-in request profiling; disabled unless an admin token or sample rate is set
+profiling_admin_token = os.environ.get('PROFILING_ADMIN_TOKEN')
+profiling_sample_rate = float(os.environ.get('PROFILING_SAMPLE_RATE', '0'))
+profile_store = ProfileStore(
+    os.environ.get('PROFILING_OUTPUT_DIR', '/tmp/travelhub-profiles'),
+    max_profiles=int(os.environ.get('PROFILING_MAX_PROFILES', '500'))
+)
+
+# Analytics and profile routes need X-Admin-Token; closed while no token is set
+admin_token = os.environ.get('ADMIN_TOKEN') or profiling_admin_token
+
+def require_admin(token: Optional[str]):
+    if not admin_token or not token or not hmac.compare_digest(token.encode(), admin_token.encode()):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
 # Create the main app without a prefix
 app = FastAPI()
 
+# Sub-requests of POST /api/batch are dispatched straight into the app's router
+batch_dispatcher = BatchDispatcher(app.router, admission_controller)
+
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
@@ -38,6 +173,7 @@ class BookingStatus(str, Enum):
     PENDING = "pending"
     CONFIRMED = "confirmed"
     CANCELLED = "cancelled"
+    EXPIRED = "expired"
 
 # Models
 class Destination(BaseModel):
@@ -47,6 +183,8 @@ class Destination(BaseModel):
     description: str
     type: DestinationType
     price_range: str  # e.g., "$$", "$$$"
+    price_tier: Optional[int] = None  # 1-4, derived from price_range
+    from_price: Optional[float] = None  # cheapest hotel price_per_night
     rating: float = Field(ge=0, le=5)
     image_url: str
     latitude: float
@@ -121,11 +259,45 @@ class BookingCreate(BaseModel):
     total_price: float
     special_requests: Optional[str] = None
 
+class DestinationSuggestion(BaseModel):
+    id: str
+    name: str
+    country: str
+    type: DestinationType
+    rating: float
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+    min_rating: Optional[float] = None
+
+class DestinationFacets(BaseModel):
+    type: List[FacetCount]
+    price_range: List[FacetCount]
+    rating: List[FacetCount]
+
+class FacetedDestinations(BaseModel):
+    results: List[Destination]
+    total: int
+    facets: DestinationFacets
+
 class SearchQuery(BaseModel):
     query: str
     destination_type: Optional[DestinationType] = None
     min_rating: Optional[float] = None
-    max_price: Optional[str] = None
+    max_price: Optional[str] = None  # price range ceiling, e.g. "$$"
+    min_price_tier: Optional[int] = Field(None, ge=pricing.PRICE_TIER_MIN, le=pricing.PRICE_TIER_MAX)
+    max_price_tier: Optional[int] = Field(None, ge=pricing.PRICE_TIER_MIN, le=pricing.PRICE_TIER_MAX)
+    min_from_price: Optional[float] = Field(None, ge=0)
+    max_from_price: Optional[float] = Field(None, ge=0)
+    sort: Optional[DestinationSort] = None
+
+# Columnar in-memory catalog serving destination and hotel reads
+SEARCH_MAX_TIME_MS = int(os.environ.get('SEARCH_MAX_TIME_MS', '2000'))
+catalog_store = CatalogStore(Destination, Hotel)
+invalidation_bus.subscribe(
+    lambda collection, document: catalog_store.apply_change(db, collection, document)
+)
 
 # Routes
 @api_router.get("/")
@@ -136,32 +308,112 @@ async def root():
 @api_router.post("/destinations", response_model=Destination)
 async def create_destination(destination: DestinationCreate):
     destination_dict = destination.dict()
+    destination_dict["price_tier"] = pricing.price_tier(destination.price_range)
     destination_obj = Destination(**destination_dict)
     await db.destinations.insert_one(destination_obj.dict())
+    await invalidation_bus.publish(db, "destinations", destination_obj.dict())
+    await publish_live_events([destination_event(destination_obj.dict())])
     return destination_obj
 
 @api_router.get("/destinations", response_model=List[Destination])
 async def get_destinations(
     type: Optional[DestinationType] = None,
+    min_price_tier: Optional[int] = Query(None, ge=pricing.PRICE_TIER_MIN, le=pricing.PRICE_TIER_MAX),
+    max_price_tier: Optional[int] = Query(None, ge=pricing.PRICE_TIER_MIN, le=pricing.PRICE_TIER_MAX),
+    min_from_price: Optional[float] = Query(None, ge=0),
+    max_from_price: Optional[float] = Query(None, ge=0),
+    sort: Optional[DestinationSort] = None,
     limit: int = Query(20, ge=1, le=100)
 ):
-    query = {}
+    price_filters = {
+        "min_tier": min_price_tier,
+        "max_tier": max_price_tier,
+        "min_from_price": min_from_price,
+        "max_from_price": max_from_price
+    }
+    if catalog_store.ready:
+        return catalog_store.destinations_page(type, limit, sort, **price_filters)
+
+    query = pricing.price_filters(**price_filters)
     if type:
         query["type"] = type
     
-    destinations = await db.destinations.find(query).limit(limit).to_list(limit)
+    cache_key = (type, limit, sort) + tuple(price_filters.values())
+    destinations = catalog_cache.get_query("destinations", cache_key)
+    if destinations is None:
+        cursor = db.destinations.find(query, {"_id": 0})
+        if sort:
+            cursor = cursor.sort(pricing.SORTS[sort])
+        destinations = await cursor.limit(limit).to_list(limit)
+        catalog_cache.set_query("destinations", cache_key, destinations)
     return [Destination(**dest) for dest in destinations]
 
+@api_router.get("/destinations/suggest", response_model=List[DestinationSuggestion])
+async def suggest_destinations(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(8, ge=1, le=20)
+):
+    return suggestion_index.suggest(q, limit)
+
+@api_router.get("/destinations/facets", response_model=FacetedDestinations)
+async def get_destination_facets(
+    type: Optional[DestinationType] = None,
+    price_range: Optional[str] = None,
+    min_rating: Optional[float] = Query(None, ge=0, le=5),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100)
+):
+    cache_key = ("facets", type, price_range, min_rating, skip, limit)
+    result = catalog_cache.get_query("destinations", cache_key)
+    if result is None:
+        result = await facets.destination_facets(
+            db,
+            destination_type=type.value if type else None,
+            price_range=price_range,
+            min_rating=min_rating,
+            skip=skip,
+            limit=limit
+        )
+        catalog_cache.set_query("destinations", cache_key, result)
+    return result
+
 @api_router.get("/destinations/{destination_id}", response_model=Destination)
 async def get_destination(destination_id: str):
-    destination = await db.destinations.find_one({"id": destination_id})
-    if not destination:
-        raise HTTPException(status_code=404, detail="Destination not found")
+    if catalog_store.ready:
+        destination = catalog_store.get_destination(destination_id)
+        if destination is None:
+            raise HTTPException(status_code=404, detail="Destination not found")
+        return destination
+
+    destination = catalog_cache.get_document("destinations", destination_id)
+    if destination is None:
+        destination = await db.destinations.find_one({"id": destination_id}, {"_id": 0})
+        if not destination:
+            raise HTTPException(status_code=404, detail="Destination not found")
+        catalog_cache.set_document("destinations", destination)
     return Destination(**destination)
 
 @api_router.post("/destinations/search", response_model=List[Destination])
 async def search_destinations(search: SearchQuery):
-    query = {}
+    max_tier = search.max_price_tier
+    if search.max_price:
+        ceiling = pricing.price_tier(search.max_price)
+        if ceiling is None:
+            raise HTTPException(status_code=400, detail="Invalid max_price")
+        max_tier = ceiling if max_tier is None else min(max_tier, ceiling)
+    price_filters = {
+        "min_tier": search.min_price_tier,
+        "max_tier": max_tier,
+        "min_from_price": search.min_from_price,
+        "max_from_price": search.max_from_price
+    }
+
+    if catalog_store.ready and catalog_store.serves_query(search.query):
+        return catalog_store.search_destinations(
+            search.query, search.destination_type, search.min_rating, sort=search.sort, **price_filters
+        )
+
+    query = pricing.price_filters(**price_filters)
     
     # Text search
     if search.query:
@@ -179,7 +431,16 @@ async def search_destinations(search: SearchQuery):
     if search.min_rating:
         query["rating"] = {"$gte": search.min_rating}
     
-    destinations = await db.destinations.find(query).limit(20).to_list(20)
+    # User regexes run on mongod with a time bound
+    cursor = db.destinations.find(query).max_time_ms(SEARCH_MAX_TIME_MS)
+    if search.sort:
+        cursor = cursor.sort(pricing.SORTS[search.sort])
+    try:
+        destinations = await cursor.limit(20).to_list(20)
+    except ExecutionTimeout:
+        raise HTTPException(status_code=400, detail="Search pattern too expensive")
+    except OperationFailure:
+        raise HTTPException(status_code=400, detail="Invalid search pattern")
     return [Destination(**dest) for dest in destinations]
 
 # Hotel routes
@@ -196,15 +457,30 @@ async def create_hotel(hotel: HotelCreate):
         hotel_data['available_to'] = hotel_data['available_to'].isoformat()
     
     await db.hotels.insert_one(hotel_data)
+    await invalidation_bus.publish(db, "hotels", hotel_data)
+
+    # A cheaper hotel lowers the destination's "from" price
+    destination = await pricing.lower_from_price(db, hotel_obj.destination_id, hotel_obj.price_per_night)
+    events = [hotel_event(hotel_data)]
+    if destination:
+        await invalidation_bus.publish(db, "destinations", destination)
+        events.append(destination_event(destination))
+    await publish_live_events(events)
     return hotel_obj
 
 @api_router.get("/hotels", response_model=List[Hotel])
 async def get_hotels(destination_id: Optional[str] = None):
+    if catalog_store.ready:
+        return catalog_store.hotels_page(destination_id)
+
     query = {}
     if destination_id:
         query["destination_id"] = destination_id
     
-    hotels = await db.hotels.find(query).limit(20).to_list(20)
+    hotels = catalog_cache.get_query("hotels", destination_id)
+    if hotels is None:
+        hotels = await db.hotels.find(query, {"_id": 0}).limit(20).to_list(20)
+        catalog_cache.set_query("hotels", destination_id, hotels)
     return [Hotel(**hotel) for hotel in hotels]
 
 # Booking routes
@@ -232,6 +508,7 @@ async def create_booking(booking: BookingCreate):
         booking_data['check_out'] = booking_data['check_out'].isoformat()
     
     await db.bookings.insert_one(booking_data)
+    await publish_booking_updates([booking_data])
     return booking_obj
 
 @api_router.get("/bookings", response_model=List[Booking])
@@ -241,15 +518,188 @@ async def get_bookings(user_email: Optional[str] = None):
         query["user_email"] = user_email
     
     bookings = await db.bookings.find(query).limit(20).to_list(20)
+    # Past stays moved out of the hot collection are still the user's bookings
+    if user_email and len(bookings) < 20:
+        # Mid-archive a booking is in both places; the hot copy wins
+        hot_ids = {booking["id"] for booking in bookings}
+        archived = await booking_lifecycle.find_archived_for_user(user_email, 20 - len(bookings))
+        bookings += [booking for booking in archived if booking["id"] not in hot_ids]
     return [Booking(**booking) for booking in bookings]
 
 @api_router.get("/bookings/{booking_id}", response_model=Booking)
 async def get_booking(booking_id: str):
     booking = await db.bookings.find_one({"id": booking_id})
+    if not booking:
+        booking = await booking_lifecycle.find_archived(booking_id)
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     return Booking(**booking)
 
+# Live update routes
+@api_router.websocket("/live/ws")
+async def live_websocket(websocket: WebSocket):
+    await websocket.accept()
+    subscriber = live_hub.connect()
+
+    async def push():
+        while True:
+            message = await subscriber.next()
+            await websocket.send_json(message)
+            if message is DROPPED:
+                await websocket.close(code=1013)
+                return
+
+    push_task = asyncio.create_task(push())
+    try:
+        while True:
+            try:
+                # Binary frames raise KeyError, malformed JSON or topics ValueError
+                subscribe, unsubscribe = parse_subscription(json.loads(await websocket.receive_text()))
+            except (KeyError, ValueError):
+                await websocket.send_json({
+                    "type": "error",
+                    "detail": 'Expected {"subscribe": [topics], "unsubscribe": [topics]}',
+                })
+                continue
+            live_hub.unsubscribe(subscriber, unsubscribe)
+            refused = live_hub.subscribe(subscriber, subscribe)
+            if refused:
+                await websocket.send_json({
+                    "type": "error",
+                    "detail": f"At most {live_hub.max_topics} topics per connection",
+                    "refused": refused,
+                })
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        push_task.cancel()
+        # Retrieve a failed send's exception so it is not logged as never retrieved
+        await asyncio.gather(push_task, return_exceptions=True)
+        live_hub.disconnect(subscriber)
+
+@api_router.get("/live/events")
+async def live_events(topics: str = Query(..., description="Comma-separated, e.g. hotel:<id>,destination:<id>")):
+    requested = list(dict.fromkeys(topic for topic in topics.split(",") if topic))
+    try:
+        subscribe, _ = parse_subscription({"subscribe": requested})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="topics must be comma-separated topic names")
+    if not subscribe:
+        raise HTTPException(status_code=400, detail="topics must name at least one topic")
+    if len(subscribe) > live_hub.max_topics:
+        raise HTTPException(status_code=400, detail=f"At most {live_hub.max_topics} topics per connection")
+
+    async def stream():
+        # Set up inside the generator so a response that never starts holds no subscriber
+        subscriber = live_hub.connect()
+        try:
+            live_hub.subscribe(subscriber, subscribe)
+            yield ": connected\n\n"
+            while True:
+                message = await subscriber.next(timeout=15)
+                if message is None:
+                    yield ": keepalive\n\n"
+                    continue
+                yield sse_format(message)
+                if message is DROPPED:
+                    return
+        finally:
+            live_hub.disconnect(subscriber)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.get("/live/stats")
+async def get_live_stats():
+    return dict(live_hub.stats(), relayed=live_relay.relayed)
+
+# Analytics routes
+@api_router.get("/analytics/revenue")
+async def get_revenue_report(
+    group_by: str = Query("destination", pattern="^(destination|hotel|month)$"),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    x_admin_token: Optional[str] = Header(None)
+):
+    require_admin(x_admin_token)
+    return await analytics.revenue(db, group_by, start, end)
+
+@api_router.get("/analytics/cancellations")
+async def get_cancellation_report(
+    group_by: str = Query("month", pattern="^(destination|hotel|month)$"),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    x_admin_token: Optional[str] = Header(None)
+):
+    require_admin(x_admin_token)
+    return await analytics.cancellation_rate(db, group_by, start, end)
+
+@api_router.get("/analytics/lead-time")
+async def get_lead_time_report(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    x_admin_token: Optional[str] = Header(None)
+):
+    require_admin(x_admin_token)
+    return await analytics.lead_time(db, start, end)
+
+@api_router.get("/analytics/occupancy")
+async def get_occupancy_report(start: date, end: date, x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    return await analytics.occupancy(db, start, end)
+
+@api_router.get("/analytics/export")
+async def export_bookings(
+    format: str = Query("parquet", pattern="^(parquet|arrow)$"),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    x_admin_token: Optional[str] = Header(None)
+):
+    require_admin(x_admin_token)
+    media_type = "application/vnd.apache.parquet" if format == "parquet" else "application/vnd.apache.arrow.stream"
+    filename = f"bookings.{format}"
+    return StreamingResponse(
+        analytics.export_bookings(db, format, start, end),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+# Batch route: several API calls in one round-trip
+@api_router.post("/batch", response_model=BatchResponse)
+async def run_batch(batch_request: BatchRequest, request: Request):
+    return await batch_dispatcher.run(request.scope, batch_request)
+
+# Profiling routes
+@api_router.get("/admin/profiles", response_model=List[str])
+async def list_profiles(x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    return profile_store.list()
+
+@api_router.get("/admin/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: str, x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    profile = profile_store.read(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
+
+@api_router.get("/catalog/stats")
+async def get_catalog_stats():
+    return {
+        "store": catalog_store.stats(),
+        "cache": catalog_cache.stats(),
+        "invalidation_mode": invalidation_bus.mode
+    }
+
+@api_router.get("/admission/metrics")
+async def get_admission_metrics():
+    return admission_controller.metrics()
+
 # AI Recommendations endpoint with real OpenAI integration
 @api_router.post("/recommendations")
 async def get_recommendations(preferences: dict):
@@ -358,6 +808,16 @@ async def get_recommendations(preferences: dict):
 # Include the router in the main app
 app.include_router(api_router)
 
+app.add_middleware(AdmissionMiddleware, controller=admission_controller)
+
+if profiling_admin_token or profiling_sample_rate:
+    app.add_middleware(
+        ProfilingMiddleware,
+        store=profile_store,
+        admin_token=profiling_admin_token,
+        sample_rate=profiling_sample_rate
+    )
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -373,8 +833,31 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def start_invalidation_bus():
+    invalidation_bus.start(db)
+    await suggestion_index.load(db)
+    await catalog_store.load(db)
+
+@app.on_event("startup")
+async def start_booking_lifecycle():
+    await booking_lifecycle.ensure_indexes()
+    booking_lifecycle.start()
+
+@app.on_event("startup")
+async def start_live_relay():
+    await live_relay.ensure_collection(db)
+    live_relay.start(db)
+
+@app.on_event("startup")
+async def ensure_price_indexes():
+    await pricing.ensure_indexes(db)
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await invalidation_bus.stop()
+    await booking_lifecycle.stop()
+    await live_relay.stop()
     client.close()
 
 # Initialize with sample data
@@ -476,5 +959,8 @@ async def initialize_sample_data():
             }
         ]
         
+        for destination in sample_destinations:
+            destination["price_tier"] = pricing.price_tier(destination["price_range"])
         await db.destinations.insert_many(sample_destinations)
+        await invalidation_bus.publish(db, "destinations")
         logger.info("Sample destinations created successfully")
\ No newline at end of file
@@ -0,0 +1,190 @@
+"""In-memory prefix index powering as-you-type destination suggestions.
+
+Each destination contributes folded (lower-cased, accent-stripped) terms: its
+full name, every word of the name, its country and its popular activities.
+Terms live in one sorted array of ``(term, destination_id)`` pairs, so a
+prefix lookup is a ``bisect`` plus a forward scan, and new destinations are
+inserted in place instead of rebuilding the whole index.
+
+The scan visits every term under the prefix, which for one to three letters
+is a large share of the catalog. Answers for those short prefixes are kept
+precomputed (the best ``max_limit`` destinations of each) and patched as
+destinations come and go; longer prefixes are scanned and kept in an LRU.
+"""
+import asyncio
+import heapq
+import logging
+import unicodedata
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def fold(text: str) -> str:
+    """Case- and accent-insensitive form of ``text``."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold().strip()
+
+
+def _terms(destination: Dict) -> Set[str]:
+    name = fold(destination["name"])
+    terms = {name, fold(destination.get("country", ""))}
+    terms.update(name.split())
+    for activity in destination.get("popular_activities", []):
+        terms.add(fold(activity))
+    terms.discard("")
+    return terms
+
+
+def _rank(entry: Dict) -> Tuple[float, str]:
+    return entry["rating"], entry["id"]
+
+
+def _entry(destination: Dict) -> Dict:
+    return {
+        "id": destination["id"],
+        "name": destination["name"],
+        "country": destination["country"],
+        "type": destination["type"],
+        "rating": destination["rating"],
+    }
+
+
+class PrefixIndex:
+    def __init__(self, max_cached_queries: int = 4096, short_prefix: int = 3, max_limit: int = 20):
+        self._keys: List[Tuple[str, str]] = []
+        self._entries: Dict[str, Dict] = {}
+        self._entry_terms: Dict[str, Set[str]] = {}
+        self._top: Dict[str, List[Dict]] = {}
+        self._cache: "OrderedDict[Tuple[str, int], List[Dict]]" = OrderedDict()
+        self.max_cached_queries = max_cached_queries
+        self.short_prefix = short_prefix
+        self.max_limit = max_limit
+        # Set while a reload runs: invalidations since it started, and the
+        # destinations added meanwhile (re-added after the rebuild)
+        self._reload: Optional[asyncio.Task] = None
+        self._stale = False
+        self._pending: Optional[List[Dict]] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, destination: Dict) -> None:
+        """Insert or replace one destination."""
+        destination_id = destination["id"]
+        if destination_id in self._entries:
+            self.remove(destination_id)
+        entry = _entry(destination)
+        self._entries[destination_id] = entry
+        terms = _terms(destination)
+        self._entry_terms[destination_id] = terms
+        for term in terms:
+            insort(self._keys, (term, destination_id))
+
+        for prefix in self._short_prefixes(terms):
+            self._top[prefix] = heapq.nlargest(self.max_limit, self._top.get(prefix, []) + [entry], key=_rank)
+        # Merge into cached answers instead of dropping them
+        for (prefix, limit), result in self._cache.items():
+            if any(term.startswith(prefix) for term in terms):
+                self._cache[(prefix, limit)] = heapq.nlargest(limit, result + [entry], key=_rank)
+
+    def remove(self, destination_id: str) -> None:
+        terms = self._entry_terms.pop(destination_id, ())
+        for term in terms:
+            position = bisect_left(self._keys, (term, destination_id))
+            if position < len(self._keys) and self._keys[position] == (term, destination_id):
+                del self._keys[position]
+        self._entries.pop(destination_id, None)
+        # A precomputed answer that loses a destination is refilled by a scan
+        for prefix in self._short_prefixes(terms):
+            if any(item["id"] == destination_id for item in self._top.get(prefix, ())):
+                self._top[prefix] = self._scan(prefix, self.max_limit)
+                if not self._top[prefix]:
+                    del self._top[prefix]
+        self._cache = OrderedDict(
+            (key, result) for key, result in self._cache.items()
+            if all(item["id"] != destination_id for item in result)
+        )
+
+    def rebuild(self, destinations: List[Dict]) -> None:
+        keys = []
+        entries = {}
+        entry_terms = {}
+        for destination in destinations:
+            entries[destination["id"]] = _entry(destination)
+            entry_terms[destination["id"]] = _terms(destination)
+            keys.extend((term, destination["id"]) for term in entry_terms[destination["id"]])
+        keys.sort()
+        matches: Dict[str, List[str]] = {}
+        for destination_id, terms in entry_terms.items():
+            for prefix in self._short_prefixes(terms):
+                matches.setdefault(prefix, []).append(destination_id)
+        self._top = {
+            prefix: heapq.nlargest(self.max_limit, (entries[i] for i in ids), key=_rank)
+            for prefix, ids in matches.items()
+        }
+        self._keys, self._entries, self._entry_terms = keys, entries, entry_terms
+        self._cache.clear()
+
+    async def load(self, db) -> None:
+        projection = {"_id": 0, "id": 1, "name": 1, "country": 1, "type": 1, "rating": 1, "popular_activities": 1}
+        self.rebuild(await db.destinations.find({}, projection).to_list(None))
+
+    def apply_change(self, db, document: Optional[Dict]) -> None:
+        """Invalidation-bus listener: add one destination or schedule a reload."""
+        if document is not None:
+            if self._pending is not None:
+                self._pending.append(document)
+            self.add(document)
+            return
+        self._stale = True
+        if self._reload is None or self._reload.done():
+            self._reload = asyncio.create_task(self._reload_while_stale(db))
+
+    async def _reload_while_stale(self, db) -> None:
+        while self._stale:
+            self._stale = False
+            self._pending = []
+            try:
+                await self.load(db)
+            except Exception:
+                logger.exception("Suggestion index reload failed")
+                return
+            finally:
+                pending, self._pending = self._pending, None
+            for document in pending:
+                self.add(document)
+
+    def suggest(self, query: str, limit: int = 8) -> List[Dict]:
+        """Top ``limit`` destinations by rating with a term starting with ``query``."""
+        prefix = fold(query)
+        if not prefix:
+            return []
+        if len(prefix) <= self.short_prefix and limit <= self.max_limit:
+            return self._top.get(prefix, [])[:limit]
+        cache_key = (prefix, limit)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            self._cache.move_to_end(cache_key)
+            return cached
+
+        result = self._scan(prefix, limit)
+        self._cache[cache_key] = result
+        if len(self._cache) > self.max_cached_queries:
+            self._cache.popitem(last=False)
+        return result
+
+    def _short_prefixes(self, terms: Iterable[str]) -> Set[str]:
+        return {term[:length] for term in terms for length in range(1, min(len(term), self.short_prefix) + 1)}
+
+    def _scan(self, prefix: str, limit: int) -> List[Dict]:
+        matched = set()
+        position = bisect_left(self._keys, (prefix,))
+        keys = self._keys
+        while position < len(keys) and keys[position][0].startswith(prefix):
+            matched.add(keys[position][1])
+            position += 1
+        entries = self._entries
+        return heapq.nlargest(limit, (entries[i] for i in matched), key=_rank)
@@ -47,21 +47,31 @@ apiClient.interceptors.response.use(
 
 // Destination API
 export const destinationApi = {
-  getAll: (type = null) => {
-    const params = type ? `?type=${type}` : '';
-    return apiClient.get(`/destinations${params}`);
+  getAll: (type = null, filters = {}) => {
+    // filters: min/max_price_tier, min/max_from_price, sort (rating, price_asc, price_desc)
+    const params = type ? { type, ...filters } : filters;
+    return apiClient.get('/destinations', { params });
   },
   
-  search: (query, destinationType = null) => {
+  search: (query, destinationType = null, filters = {}) => {
     return apiClient.post('/destinations/search', {
       query,
-      destination_type: destinationType
+      destination_type: destinationType,
+      ...filters
     });
   },
   
   getById: (id) => {
     return apiClient.get(`/destinations/${id}`);
   },
+
+  suggest: (q, limit = 8) => {
+    return apiClient.get('/destinations/suggest', { params: { q, limit } });
+  },
+
+  getFacets: (filters = {}) => {
+    return apiClient.get('/destinations/facets', { params: filters });
+  },
   
   getRecommendations: (preferences) => {
     return apiClient.post('/recommendations', { preferences });
@@ -106,4 +116,12 @@ export const bookingApi = {
   }
 };
 
+// Batch API: several calls in one round-trip, e.g.
+// batchApi.run([{ id: 'dest', path: `/api/destinations/${id}` }, { id: 'hotels', path: `/api/hotels?destination_id=${id}` }])
+export const batchApi = {
+  run: (requests, timeout = 8) => {
+    return apiClient.post('/batch', { requests, timeout });
+  }
+};
+
 export default apiClient;
\ No newline at end of file
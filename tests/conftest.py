@@ -0,0 +1,156 @@
+import re
+import sys
+from pathlib import Path
+
+import pytest
+from pymongo.errors import OperationFailure
+
+# Backend modules import each other by bare name (``import pricing``)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+
+def _matches(document, query):
+    """The subset of MongoDB query operators the backend's filters use."""
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(_matches(document, branch) for branch in condition):
+                return False
+            continue
+        value = document.get(key)
+        if not isinstance(condition, dict):
+            if value != condition:
+                return False
+            continue
+        for operator, operand in condition.items():
+            if operator == "$in" and value not in operand:
+                return False
+            if operator == "$nin" and value in operand:
+                return False
+            if operator == "$ne" and value == operand:
+                return False
+            if operator in ("$lt", "$lte", "$gt", "$gte"):
+                if value is None:
+                    return False
+                compare = {"$lt": value < operand, "$lte": value <= operand,
+                           "$gt": value > operand, "$gte": value >= operand}
+                if not compare[operator]:
+                    return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, documents, before_read=None):
+        self.documents = documents
+        self.before_read = before_read
+
+    def sort(self, key, direction=1):
+        self.documents.sort(key=lambda document: document[key], reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        self.documents = self.documents[:count]
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    async def to_list(self, length):
+        if self.before_read:
+            await self.before_read()
+        return self.documents if length is None else self.documents[:length]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in await self.to_list(None):
+            yield document
+
+
+class FakeResult:
+    def __init__(self, deleted_count=0):
+        self.deleted_count = deleted_count
+
+
+class FakeCollection:
+    """In-memory stand-in for a Motor collection.
+
+    ``aggregate`` does not run the pipeline: it records it and returns
+    ``aggregate_rows``. ``before_read`` (async) runs before a cursor returns,
+    and ``on_bulk_write`` after a bulk write, to interleave concurrent changes.
+    """
+
+    def __init__(self):
+        self.documents = []
+        self.aggregate_rows = []
+        self.pipelines = []
+        self.indexes = {}
+        self.before_read = None
+        self.on_bulk_write = None
+
+    def find(self, query=None, projection=None):
+        documents = [dict(document) for document in self.documents if _matches(document, query or {})]
+        return FakeCursor(documents, self.before_read)
+
+    async def find_one(self, query=None, projection=None):
+        documents = await self.find(query, projection).to_list(1)
+        return documents[0] if documents else None
+
+    def aggregate(self, pipeline, **kwargs):
+        self.pipelines.append(pipeline)
+        return FakeCursor(list(self.aggregate_rows), self.before_read)
+
+    async def insert_many(self, documents, ordered=True):
+        self.documents.extend(dict(document) for document in documents)
+
+    async def bulk_write(self, operations, ordered=True):
+        for operation in operations:
+            # ReplaceOne(upsert=True) is the only operation the backend bulk-writes
+            query, replacement = operation._filter, operation._doc
+            self.documents = [document for document in self.documents if not _matches(document, query)]
+            self.documents.append(dict(replacement))
+        if self.on_bulk_write:
+            self.on_bulk_write()
+
+    async def delete_many(self, query):
+        kept = [document for document in self.documents if not _matches(document, query)]
+        deleted = len(self.documents) - len(kept)
+        self.documents = kept
+        return FakeResult(deleted)
+
+    async def create_index(self, keys, unique=False, **kwargs):
+        if isinstance(keys, str):
+            keys = [(keys, 1)]
+        if unique:
+            values = [tuple(document.get(key) for key, _ in keys) for document in self.documents]
+            if len(values) != len(set(values)):
+                raise OperationFailure("E11000 duplicate key error", code=11000)
+        name = "_".join(f"{key}_{direction}" for key, direction in keys)
+        self.indexes[name] = {"unique": unique}
+        return name
+
+    async def index_information(self):
+        return dict(self.indexes)
+
+    async def drop_index(self, name):
+        del self.indexes[name]
+
+
+class FakeDatabase(dict):
+    """Collections by name, created on first access like MongoDB's."""
+
+    def __missing__(self, name):
+        collection = self[name] = FakeCollection()
+        return collection
+
+    def __getattr__(self, name):
+        return self[name]
+
+    async def list_collection_names(self, filter=None):
+        pattern = (filter or {}).get("name", {}).get("$regex", "")
+        return [name for name in self if re.match(pattern, name)]
+
+
+@pytest.fixture
+def fake_db():
+    return FakeDatabase()
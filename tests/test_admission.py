@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+
+from admission import AdmissionController, AdmissionMiddleware, InMemoryRateLimitStore, PriorityLimiter, RouteRule, Shed
+
+
+def test_rate_limit_store_grants_burst_then_reports_wait():
+    async def run():
+        store = InMemoryRateLimitStore()
+        granted = [await store.consume("client", rate=1, burst=3) for _ in range(3)]
+        return granted, await store.consume("client", rate=1, burst=3)
+
+    granted, retry_after = asyncio.run(run())
+    assert granted == [0.0, 0.0, 0.0]
+    assert 0 < retry_after <= 1
+
+
+def test_rate_limit_store_keys_are_independent():
+    async def run():
+        store = InMemoryRateLimitStore()
+        await store.consume("a", rate=1, burst=1)
+        return await store.consume("a", rate=1, burst=1), await store.consume("b", rate=1, burst=1)
+
+    a, b = asyncio.run(run())
+    assert a > 0
+    assert b == 0
+
+
+def test_priority_limiter_serves_waiters_by_priority():
+    async def run():
+        limiter = PriorityLimiter("test", limit=1, max_queue=10)
+        await limiter.acquire(1, timeout=1)
+        order = []
+
+        async def waiter(name, priority):
+            await limiter.acquire(priority, timeout=1)
+            order.append(name)
+            limiter.release()
+
+        browse = asyncio.create_task(waiter("browse", 1))
+        await asyncio.sleep(0)
+        booking = asyncio.create_task(waiter("booking", 0))
+        await asyncio.sleep(0)
+        limiter.release()
+        await asyncio.gather(browse, booking)
+        return order, limiter.active
+
+    order, active = asyncio.run(run())
+    assert order == ["booking", "browse"]
+    assert active == 0
+
+
+def test_priority_limiter_sheds_on_timeout_and_full_queue():
+    async def run():
+        limiter = PriorityLimiter("test", limit=1, max_queue=1)
+        await limiter.acquire(0, timeout=1)
+        queued = asyncio.create_task(limiter.acquire(0, timeout=0.05))
+        await asyncio.sleep(0)
+        with pytest.raises(Shed, match="queue full"):
+            await limiter.acquire(0, timeout=1)
+        with pytest.raises(Shed, match="exceeded"):
+            await queued
+        return limiter.active, limiter.queued
+
+    assert asyncio.run(run()) == (1, 0)
+
+
+def test_long_lived_rule_takes_no_pool_slot():
+    async def run():
+        controller = AdmissionController(
+            rules=[RouteRule("live", "GET", "/api/live/*", rate=10, burst=10, long_lived=True)],
+            global_concurrency=1,
+        )
+        rule = controller.match("GET", "/api/live/events")
+        held = [await controller.admit(rule, "client") for _ in range(3)]
+        return held, controller.global_limiter.active
+
+    held, active = asyncio.run(run())
+    assert held == [[], [], []]
+    assert active == 0
+
+
+def test_match_uses_first_matching_rule():
+    controller = AdmissionController()
+    assert controller.match("POST", "/api/destinations/search").name == "search"
+    assert controller.match("DELETE", "/api/bookings/abc").name == "bookings"
+    assert controller.match("GET", "/api/destinations").name == "default"
+    assert controller.match("GET", "/health") is None
+
+
+def test_middleware_rate_limits_websocket_handshakes():
+    from starlette.applications import Starlette
+    from starlette.routing import WebSocketRoute
+    from starlette.testclient import TestClient
+    from starlette.websockets import WebSocketDisconnect
+
+    async def echo(websocket):
+        await websocket.accept()
+        await websocket.close()
+
+    controller = AdmissionController(rules=[RouteRule("live", "GET", "/live/*", rate=0.001, burst=2, long_lived=True)])
+    app = AdmissionMiddleware(Starlette(routes=[WebSocketRoute("/live/ws", echo)]), controller)
+    client = TestClient(app)
+    for _ in range(2):
+        with client.websocket_connect("/live/ws"):
+            pass
+    with pytest.raises(WebSocketDisconnect) as refused:
+        with client.websocket_connect("/live/ws"):
+            pass
+    assert refused.value.code == 1008
+    assert controller.metrics()["routes"]["live"]["rate_limited"] == 1
+
+
+def _scope(*forwarded, client="10.0.0.1"):
+    return {"headers": [(b"x-forwarded-for", value.encode()) for value in forwarded], "client": (client, 1234)}
+
+
+def test_client_key_ignores_forwarded_for_unless_proxies_are_trusted():
+    assert AdmissionController().client_key(_scope("1.1.1.1")) == "10.0.0.1"
+
+
+def test_client_key_takes_the_entry_the_trusted_proxies_appended():
+    one_proxy = AdmissionController(trusted_proxies=1)
+    # The client may prepend anything; the ingress appends the address it saw
+    assert one_proxy.client_key(_scope("6.6.6.6, 203.0.113.7")) == "203.0.113.7"
+    assert one_proxy.client_key(_scope("6.6.6.6", "203.0.113.7")) == "203.0.113.7"
+    assert one_proxy.client_key(_scope()) == "10.0.0.1"
+
+    two_proxies = AdmissionController(trusted_proxies=2)
+    assert two_proxies.client_key(_scope("6.6.6.6, 203.0.113.7, 10.1.1.1")) == "203.0.113.7"
+    assert two_proxies.client_key(_scope("203.0.113.7")) == "10.0.0.1"
+
+
+def test_rate_limit_store_evicts_least_recently_used_keys():
+    async def run():
+        store = InMemoryRateLimitStore(max_keys=2)
+        await store.consume("a", rate=0.001, burst=1)
+        await store.consume("b", rate=0.001, burst=1)
+        # "a" is refused but touched, so "b" is now the oldest
+        assert await store.consume("a", rate=0.001, burst=1) > 0
+        await store.consume("c", rate=0.001, burst=1)
+        return list(store._buckets)
+
+    assert asyncio.run(run()) == ["a", "c"]
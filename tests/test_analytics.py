@@ -0,0 +1,93 @@
+import asyncio
+import io
+from datetime import date, datetime
+
+import pyarrow.parquet as pq
+import pytest
+
+import analytics
+
+
+def test_date_match_is_half_open_on_check_in():
+    assert analytics._date_match(None, None) == {}
+    assert analytics._date_match(date(2025, 1, 1), date(2025, 2, 1)) == {
+        "check_in": {"$gte": "2025-01-01", "$lt": "2025-02-01"},
+    }
+
+
+def test_pipelines_reject_unknown_groupings():
+    with pytest.raises(ValueError):
+        analytics.revenue_pipeline("country")
+    with pytest.raises(ValueError):
+        analytics.cancellation_pipeline("country")
+    match = analytics.revenue_pipeline("month", start=date(2025, 1, 1))[0]["$match"]
+    assert match["status"] == {"$nin": analytics.UNREALISED_STATUSES}
+
+
+def test_reports_union_only_overlapping_archive_months(fake_db):
+    fake_db.bookings.aggregate_rows = [{"key": "h1", "revenue": 10.0}]
+    for month in ("2024_12", "2025_01", "2025_02", "2025_04"):
+        fake_db[f"bookings_archive_{month}"].documents = []
+    rows = asyncio.run(analytics.revenue(fake_db, "hotel", date(2025, 1, 1), date(2025, 3, 1)))
+    assert rows == [{"key": "h1", "revenue": 10.0}]
+    pipeline = fake_db.bookings.pipelines[0]
+    unions = [stage["$unionWith"] for stage in pipeline if "$unionWith" in stage]
+    assert [union["coll"] for union in unions] == ["bookings_archive_2025_01", "bookings_archive_2025_02"]
+    assert all(union["pipeline"] == [pipeline[0]] for union in unions)
+
+
+def test_lead_time_summary(fake_db):
+    fake_db.bookings.aggregate_rows = [{"lead_days": float(days)} for days in range(1, 101)]
+    summary = asyncio.run(analytics.lead_time(fake_db))
+    assert summary["bookings"] == 100
+    assert summary["mean_days"] == 50.5
+    assert summary["p50_days"] == 50.5
+    assert summary["max_days"] == 100.0
+    fake_db.bookings.aggregate_rows = []
+    assert asyncio.run(analytics.lead_time(fake_db)) == {"bookings": 0}
+
+
+def test_occupancy_clips_availability_to_the_window(fake_db):
+    fake_db.bookings.aggregate_rows = [{"_id": "h1", "booked_nights": 15.0}, {"_id": "h2", "booked_nights": 40.0}]
+    fake_db.hotels.documents = [
+        {"id": "h1", "name": "One", "destination_id": "d", "available_from": "2024-01-01", "available_to": "2026-01-01"},
+        {"id": "h2", "name": "Two", "destination_id": "d", "available_from": "2025-01-21", "available_to": "2026-01-01"},
+        {"id": "h3", "name": "Three", "destination_id": "d", "available_from": "2025-06-01", "available_to": "2026-01-01"},
+    ]
+    rows = asyncio.run(analytics.occupancy(fake_db, date(2025, 1, 1), date(2025, 1, 31)))
+    by_hotel = {row["hotel_id"]: row for row in rows}
+    assert [row["hotel_id"] for row in rows][:2] == ["h2", "h1"]
+    assert by_hotel["h1"]["available_nights"] == 30
+    assert by_hotel["h1"]["occupancy_rate"] == 0.5
+    assert by_hotel["h2"]["available_nights"] == 10
+    assert by_hotel["h2"]["occupancy_rate"] == 1.0
+    assert by_hotel["h3"]["available_nights"] == 0
+    assert by_hotel["h3"]["occupancy_rate"] == 0.0
+
+
+def test_occupancy_reads_every_archive_a_long_stay_could_start_in(fake_db):
+    for month in ("2023_06", "2024_12", "2025_01", "2025_02"):
+        fake_db[f"bookings_archive_{month}"].documents = []
+    asyncio.run(analytics.occupancy(fake_db, date(2025, 1, 1), date(2025, 1, 31)))
+    unions = [stage["$unionWith"]["coll"] for stage in fake_db.bookings.pipelines[0] if "$unionWith" in stage]
+    assert unions == ["bookings_archive_2023_06", "bookings_archive_2024_12", "bookings_archive_2025_01"]
+
+
+def test_export_streams_archived_and_hot_bookings_as_parquet(fake_db):
+    def booking(booking_id, check_in):
+        return {
+            "id": booking_id, "user_email": "guest@example.com", "destination_id": "d", "hotel_id": "h",
+            "check_in": check_in, "check_out": "2025-01-09", "guests": 2, "total_price": 120.0,
+            "status": "confirmed", "created_at": datetime(2024, 12, 1, 8, 30),
+        }
+
+    fake_db.bookings.documents = [booking("hot", "2025-01-07")]
+    fake_db.bookings_archive_2025_01.documents = [booking("archived-1", "2025-01-02"), booking("archived-2", "2025-01-03")]
+
+    async def collect():
+        return b"".join([chunk async for chunk in analytics.export_bookings(fake_db, "parquet", chunk_size=2)])
+
+    table = pq.read_table(io.BytesIO(asyncio.run(collect())))
+    assert table.column("id").to_pylist() == ["archived-1", "archived-2", "hot"]
+    assert table.column("check_in").to_pylist()[0] == date(2025, 1, 2)
+    assert table.schema.field("created_at").type.unit == "ms"
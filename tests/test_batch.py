@@ -0,0 +1,54 @@
+import asyncio
+
+from starlette.responses import JSONResponse
+from starlette.routing import Route, Router
+
+from admission import AdmissionController, RouteRule
+from batch import BatchDispatcher, BatchRequest
+
+
+async def echo(request):
+    return JSONResponse({"path": request.url.path, "q": request.query_params.get("q")})
+
+
+async def broken(request):
+    raise RuntimeError("connection to mongod-internal:27017 refused")
+
+
+def _run_batch(controller, requests):
+    routes = [Route("/api/echo", echo), Route("/api/other", echo), Route("/api/broken", broken)]
+    dispatcher = BatchDispatcher(Router(routes), controller)
+    parent = {"type": "http", "headers": [], "client": ("10.0.0.1", 1234)}
+
+    async def run():
+        # The outer POST /api/batch already holds the only global slot
+        await controller.global_limiter.acquire(0, timeout=1)
+        return await dispatcher.run(parent, BatchRequest(requests=requests, timeout=2))
+
+    return asyncio.run(run())
+
+
+def test_sub_requests_reuse_the_parent_global_slot():
+    controller = AdmissionController(
+        rules=[RouteRule("default", "*", "/api/*", rate=100, burst=100)], global_concurrency=1
+    )
+    result = _run_batch(controller, [{"id": "a", "path": "/api/echo?q=1"}, {"id": "b", "path": "/api/other"}])
+    assert [r["status"] for r in result["responses"]] == [200, 200]
+    assert result["responses"][0]["body"] == {"path": "/api/echo", "q": "1"}
+    assert controller.global_limiter.active == 1
+
+
+def test_sub_requests_are_rate_limited_and_validated():
+    controller = AdmissionController(rules=[RouteRule("default", "*", "/api/*", rate=0.01, burst=1)])
+    result = _run_batch(controller, [
+        {"path": "/api/echo"}, {"path": "/api/echo"}, {"path": "/api/batch"}, {"method": "DELETE", "path": "/api/echo"},
+    ])
+    assert [r["status"] for r in result["responses"]] == [200, 429, 400, 400]
+
+
+def test_unexpected_errors_are_logged_not_returned(caplog):
+    controller = AdmissionController(rules=[RouteRule("default", "*", "/api/*", rate=100, burst=100)])
+    result = _run_batch(controller, [{"path": "/api/broken"}])
+    assert result["responses"][0]["status"] == 500
+    assert result["responses"][0]["body"] == {"detail": "Internal Server Error"}
+    assert "mongod-internal" in caplog.text
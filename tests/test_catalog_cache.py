@@ -0,0 +1,71 @@
+import asyncio
+
+from catalog_cache import InvalidationBus, LocalCache
+
+
+def test_local_cache_delta_and_invalidation():
+    cache = LocalCache(ttl_seconds=60)
+    cache.set_document("destinations", {"id": "a", "name": "Paris"})
+    cache.set_query("destinations", ("beach", 20), [])
+    cache.apply_delta("destinations", {"id": "a", "name": "Lyon"})
+    assert cache.get_document("destinations", "a")["name"] == "Lyon"
+    assert cache.get_query("destinations", ("beach", 20)) is None
+
+    cache.invalidate("destinations")
+    assert cache.get_document("destinations", "a") is None
+
+
+def test_change_stream_echo_of_local_write_is_skipped_once():
+    bus = InvalidationBus(LocalCache())
+    bus.mode = "change_stream"
+    bus._expect_echo("hotels", "h1")
+    bus._expect_echo("hotels", "h1")
+    assert bus._is_echo("hotels", "h1")
+    assert bus._is_echo("hotels", "h1")
+    assert not bus._is_echo("hotels", "h1")
+    assert not bus._is_echo("hotels", "other")
+
+
+class _VersionCollection:
+    def __init__(self):
+        self.version = 0
+
+    async def find_one_and_update(self, *args, **kwargs):
+        self.version += 1
+        return {"_id": "catalog", "hotels": self.version}
+
+
+def test_publish_does_not_absorb_another_workers_bump():
+    versions = _VersionCollection()
+    db = {"catalog_versions": versions}
+    bus = InvalidationBus(LocalCache())
+    bus.mode = "polling"
+    bus._versions["hotels"] = 0
+    seen = []
+    bus.subscribe(lambda collection, document: seen.append(document and document["id"]))
+
+    asyncio.run(bus.publish(db, "hotels", {"id": "h1"}))
+    assert seen == ["h1"]
+
+    versions.version += 1  # another worker wrote before our next publish
+    asyncio.run(bus.publish(db, "hotels", {"id": "h2"}))
+    assert seen == ["h1", "h2", None]
+    assert bus._versions["hotels"] == 3
+
+
+def test_query_results_are_capped_lru():
+    cache = LocalCache(ttl_seconds=60, max_queries=3)
+    for key in range(3):
+        cache.set_query("destinations", key, [key])
+    assert cache.get_query("destinations", 0) == [0]
+    cache.set_query("destinations", 3, [3])
+    assert cache.stats()["queries"] == 3
+    assert cache.get_query("destinations", 1) is None
+    assert cache.get_query("destinations", 0) == [0]
+
+
+def test_expired_query_results_are_evicted_on_read():
+    cache = LocalCache(ttl_seconds=0)
+    cache.set_query("hotels", "d1", [])
+    assert cache.get_query("hotels", "d1") is None
+    assert cache.stats()["queries"] == 0
@@ -0,0 +1,184 @@
+import asyncio
+import math
+
+import pytest
+
+import datagen
+import pricing
+from catalog_store import CatalogStore
+
+
+def _store(destinations, hotels=()):
+    store = CatalogStore(lambda **doc: doc, lambda **doc: doc)
+    store.set_destinations(list(destinations))
+    store.set_hotels(list(hotels))
+    return store
+
+
+def _destination(index, type="beach", rating=4.0, price_tier=2, from_price=None, name=None):
+    return {
+        "id": f"d{index}", "name": name or f"Place {index}", "country": "France", "description": "",
+        "type": type, "price_range": "$" * price_tier, "price_tier": price_tier, "from_price": from_price,
+        "rating": rating, "latitude": 0.0, "longitude": 0.0,
+    }
+
+
+def _mongo_order(documents, sort):
+    """Reference ordering for ``pricing.SORTS``: null sorts lowest, ties keep insertion order."""
+    ordered = list(documents)
+    for field, direction in reversed(pricing.SORTS[sort]):
+        def key(doc, field=field):
+            value = doc.get(field)
+            return -math.inf if value is None else value
+        ordered.sort(key=key, reverse=direction < 0)
+    return [doc["id"] for doc in ordered]
+
+
+def test_codes_widen_beyond_int16():
+    destinations = 40_000
+    hotels = [{"id": f"h{i}", "destination_id": f"d{i}", "price_per_night": 100.0, "rating": 4.0,
+               "latitude": 0.0, "longitude": 0.0} for i in range(destinations)]
+    store = _store([], hotels)
+    assert store.hotels_page("d36757")[0]["id"] == "h36757"
+
+
+@pytest.mark.parametrize("sort", list(pricing.DestinationSort))
+def test_sort_matches_mongo_semantics(sort):
+    documents = [
+        _destination(0, rating=4.5, from_price=120.0),
+        _destination(1, rating=3.5, from_price=None),
+        _destination(2, rating=4.8, from_price=80.0),
+        _destination(3, rating=4.1, from_price=120.0),
+        _destination(4, rating=4.9, from_price=None),
+    ]
+    store = _store(documents)
+    result = [doc["id"] for doc in store.destinations_page(None, 10, sort)]
+    assert result == _mongo_order(documents, sort)
+
+
+def test_price_filters_exclude_missing_values():
+    documents = [
+        _destination(0, price_tier=1, from_price=50.0),
+        _destination(1, price_tier=3, from_price=200.0),
+        _destination(2, price_tier=2, from_price=None),
+        {**_destination(3), "price_tier": None},
+    ]
+    store = _store(documents)
+
+    def ids(**filters):
+        return [doc["id"] for doc in store.destinations_page(None, 10, **filters)]
+
+    assert ids(max_tier=2) == ["d0", "d2"]
+    assert ids(min_tier=2) == ["d1", "d2"]
+    assert ids(max_from_price=100) == ["d0"]
+    assert ids(min_from_price=100) == ["d1"]
+
+
+def test_search_combines_text_type_and_rating():
+    documents = [
+        _destination(0, name="Paris", type="city", rating=4.8),
+        _destination(1, name="Paros", type="beach", rating=4.2),
+        _destination(2, name="Parma", type="city", rating=3.9),
+    ]
+    store = _store(documents)
+    assert [d["id"] for d in store.search_destinations("par")] == ["d0", "d1", "d2"]
+    assert [d["id"] for d in store.search_destinations("par", "city", 4.0)] == ["d0"]
+    assert [d["id"] for d in store.search_destinations("par", sort="rating", limit=2)] == ["d0", "d1"]
+
+
+def test_top_destinations_by_rating():
+    store = _store(datagen.generate_destinations(200, seed=1))
+    ratings = [doc["rating"] for doc in store.top_destinations(10)]
+    assert ratings == sorted(ratings, reverse=True)
+    assert ratings[0] == max(doc["rating"] for doc in store.destinations.documents)
+
+
+def test_apply_change_patches_and_appends_in_place():
+    store = _store([_destination(0, name="Paris", rating=4.0), _destination(1, name="Rome", rating=4.5)])
+    assert [d["id"] for d in store.search_destinations("paris")] == ["d0"]
+
+    store.apply_change(None, "destinations", _destination(0, name="Lyon", rating=4.9))
+    store.apply_change(None, "destinations", _destination(2, name="Parisian Bay", type="city", rating=3.0))
+
+    assert len(store.destinations) == 3
+    assert store.get_destination("d0")["name"] == "Lyon"
+    assert store.destinations.rating.tolist() == pytest.approx([4.9, 4.5, 3.0])
+    assert [d["id"] for d in store.search_destinations("paris")] == ["d2"]
+    assert [d["id"] for d in store.destinations_page("city")] == ["d2"]
+
+
+def test_appends_grow_columns_and_codes():
+    store = _store([], [])
+    for index in range(100):
+        store.apply_change(None, "hotels", {
+            "id": f"h{index}", "destination_id": f"d{index % 7}", "price_per_night": float(index),
+            "rating": 4.0, "latitude": 0.0, "longitude": 0.0,
+        })
+    assert len(store.hotels) == 100
+    assert store.hotels.price.shape == (100,)
+    assert [hotel["id"] for hotel in store.hotels_page("d3", limit=3)] == ["h3", "h10", "h17"]
+
+
+def test_regex_queries_are_left_to_mongo():
+    store = _store([_destination(0, name="Paris")])
+    assert store.serves_query("par")
+    assert store.serves_query(None)
+    assert not store.serves_query("(a+)+$")
+    with pytest.raises(ValueError):
+        store.search_destinations("^par")
+
+
+def test_reload_replays_deltas_and_reruns_for_invalidations_during_the_load(fake_db):
+    fake_db.destinations.documents = [_destination(0), _destination(1)]
+
+    async def run():
+        store = _store([_destination(0)])
+        gate = asyncio.Event()
+        reads = []
+
+        async def before_read():
+            reads.append(len(reads))
+            if len(reads) == 1:
+                await gate.wait()
+
+        fake_db.destinations.before_read = before_read
+        store.apply_change(fake_db, "destinations", None)
+        await asyncio.sleep(0)
+        # While the first load waits on Mongo: a delta and a second invalidation
+        fake_db.destinations.documents.append(_destination(2, rating=4.9))
+        store.apply_change(fake_db, "destinations", _destination(2, rating=4.9))
+        fake_db.destinations.documents.append(_destination(3))
+        store.apply_change(fake_db, "destinations", None)
+        gate.set()
+        await store._reloads["destinations"]
+        return store, reads
+
+    store, reads = asyncio.run(run())
+    assert len(reads) == 2
+    assert store.destinations is not None and sorted(store.destinations.ids) == ["d0", "d1", "d2", "d3"]
+    assert store.get_destination("d2")["rating"] == 4.9
+    assert store._pending == {}
+
+
+def test_reload_keeps_deltas_its_snapshot_missed(fake_db):
+    fake_db.destinations.documents = [_destination(0)]
+
+    async def run():
+        store = _store([_destination(0)])
+        gate = asyncio.Event()
+
+        async def before_read():
+            await gate.wait()
+
+        fake_db.destinations.before_read = before_read
+        store.apply_change(fake_db, "destinations", None)
+        await asyncio.sleep(0)
+        # Written after the reload's snapshot was taken
+        fake_db.destinations.documents.append(_destination(1))
+        store.apply_change(fake_db, "destinations", _destination(1))
+        gate.set()
+        await store._reloads["destinations"]
+        return store
+
+    store = asyncio.run(run())
+    assert sorted(store.destinations.ids) == ["d0", "d1"]
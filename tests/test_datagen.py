@@ -0,0 +1,48 @@
+from datetime import date, datetime, timedelta
+
+import datagen
+
+
+def test_default_start_is_first_of_month_a_year_back():
+    assert datagen.default_start(date(2026, 10, 18)) == date(2025, 10, 1)
+    assert datagen.default_start(date(2024, 2, 29)) == date(2023, 2, 1)
+
+
+def test_bookings_are_deterministic_for_the_same_arguments():
+    first = list(datagen.generate_bookings(500, hotels=40, destinations=8, seed=3, start=date(2025, 1, 1), block=128))
+    second = list(datagen.generate_bookings(500, hotels=40, destinations=8, seed=3, start=date(2025, 1, 1), block=128))
+    assert first == second
+    other = list(datagen.generate_bookings(500, hotels=40, destinations=8, seed=4, start=date(2025, 1, 1), block=128))
+    assert [booking["id"] for booking in other] != [booking["id"] for booking in first]
+
+
+def test_stays_span_past_and_future_of_the_default_window():
+    today = date.today()
+    bookings = list(datagen.generate_bookings(2_000, hotels=40, destinations=8, seed=1))
+    check_ins = [date.fromisoformat(booking["check_in"]) for booking in bookings]
+    assert min(check_ins) >= datagen.default_start()
+    assert max(check_ins) < datagen.default_start() + timedelta(days=datagen.BOOKING_DAYS)
+    assert any(check_in < today - timedelta(days=200) for check_in in check_ins)
+    assert any(check_in > today for check_in in check_ins)
+
+
+def test_catalog_dates_follow_start():
+    start = date(2030, 6, 1)
+    hotel = datagen.make_hotel(7, 3, destinations=2, start=start)
+    destination = datagen.make_destination(7, 1, start=start)
+    assert start <= date.fromisoformat(hotel["available_from"]) < start + timedelta(days=181)
+    assert hotel["created_at"].date() == start
+    assert destination["created_at"].date() == start
+
+
+def test_bookings_are_created_before_now_and_stay_while_hotels_are_open():
+    start = date(2025, 10, 1)
+    now = datetime.combine(start + timedelta(days=datagen.HISTORY_DAYS), datetime.min.time())
+    hotels = {hotel["id"]: hotel for hotel in datagen.generate_hotels(60, destinations=6, seed=2, start=start)}
+    bookings = list(datagen.generate_bookings(3_000, hotels=60, destinations=6, seed=2, start=start))
+    for booking in bookings:
+        hotel = hotels[booking["hotel_id"]]
+        assert hotel["available_from"] <= booking["check_in"] < booking["check_out"] <= hotel["available_to"]
+        assert booking["created_at"] <= now
+        assert booking["created_at"] <= datetime.fromisoformat(booking["check_in"])
+    assert any(booking["check_in"] > now.date().isoformat() for booking in bookings)
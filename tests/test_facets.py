@@ -0,0 +1,38 @@
+from facets import facet_pipeline, parse_facet_result
+
+
+def test_parse_facet_result_reports_cumulative_ratings():
+    parsed = parse_facet_result({
+        "results": [{"id": "a"}],
+        "total": [{"count": 12}],
+        "type": [{"_id": "beach", "count": 7}, {"_id": "city", "count": 5}],
+        "price_range": [{"_id": "$$", "count": 12}],
+        "rating": [{"_id": 3, "count": 2}, {"_id": 4, "count": 4}, {"_id": 4.5, "count": 5}, {"_id": 0, "count": 1}],
+    })
+    assert parsed["results"] == [{"id": "a"}]
+    assert parsed["total"] == 12
+    assert parsed["facets"]["type"] == [{"value": "beach", "count": 7}, {"value": "city", "count": 5}]
+    assert parsed["facets"]["price_range"] == [{"value": "$$", "count": 12}]
+    assert parsed["facets"]["rating"] == [
+        {"value": "4.5+", "min_rating": 4.5, "count": 5},
+        {"value": "4+", "min_rating": 4, "count": 9},
+        {"value": "3.5+", "min_rating": 3.5, "count": 9},
+        {"value": "3+", "min_rating": 3, "count": 11},
+    ]
+
+
+def test_parse_facet_result_handles_no_matches():
+    parsed = parse_facet_result({"results": [], "total": [], "type": [], "price_range": [], "rating": []})
+    assert parsed["total"] == 0
+    assert [row["count"] for row in parsed["facets"]["rating"]] == [0, 0, 0, 0]
+
+
+def test_each_facet_is_counted_without_its_own_filter():
+    stages = facet_pipeline(destination_type="beach", price_range="$$", min_rating=4, skip=20, limit=10)[0]["$facet"]
+    everything = {"type": "beach", "price_range": "$$", "rating": {"$gte": 4}}
+    assert stages["results"][0] == {"$match": everything}
+    assert {"$skip": 20} in stages["results"] and {"$limit": 10} in stages["results"]
+    assert stages["total"][0] == {"$match": everything}
+    assert stages["type"][0] == {"$match": {"price_range": "$$", "rating": {"$gte": 4}}}
+    assert stages["price_range"][0] == {"$match": {"type": "beach", "rating": {"$gte": 4}}}
+    assert stages["rating"][0] == {"$match": {"type": "beach", "price_range": "$$"}}
@@ -0,0 +1,58 @@
+import asyncio
+from datetime import date
+
+from lifecycle import LOCATOR_COLLECTION, BookingLifecycle, _months_before, archive_name
+
+
+def _booking(booking_id, status="confirmed", check_out="2025-01-05"):
+    return {
+        "id": booking_id, "status": status, "user_email": f"{booking_id}@example.com",
+        "check_in": "2025-01-01", "check_out": check_out,
+    }
+
+
+def test_archive_name_and_cutoff_months():
+    assert archive_name("2025-03-14") == "bookings_archive_2025_03"
+    assert _months_before(date(2026, 2, 18), 6) == date(2025, 8, 1)
+    assert _months_before(date(2026, 10, 18), 12) == date(2025, 10, 1)
+
+
+def test_archive_moves_old_bookings_and_keeps_recent_ones(fake_db):
+    db = fake_db
+    db.bookings.documents = [_booking("a"), _booking("b", "cancelled"), _booking("c", "pending"),
+                             _booking("d", check_out="2026-09-01")]
+    lifecycle = BookingLifecycle(db, archive_after_months=6)
+    archived = asyncio.run(lifecycle.archive_completed(today=date(2026, 10, 18)))
+    assert archived == 2
+    assert sorted(document["id"] for document in db.bookings.documents) == ["c", "d"]
+    assert sorted(document["id"] for document in db["bookings_archive_2025_01"].documents) == ["a", "b"]
+    assert {document["_id"] for document in db[LOCATOR_COLLECTION].documents} == {"a", "b"}
+
+
+def test_archive_recopies_bookings_changed_between_copy_and_delete(fake_db):
+    db = fake_db
+    db.bookings.documents = [_booking("a"), _booking("b")]
+    archive = db["bookings_archive_2025_01"]
+    changes = iter([lambda: db.bookings.documents[0].update(status="cancelled")])
+    archive.on_bulk_write = lambda: next(changes, lambda: None)()
+
+    archived = asyncio.run(BookingLifecycle(db).archive_completed(today=date(2026, 10, 18)))
+    assert archived == 2
+    assert db.bookings.documents == []
+    assert {document["id"]: document["status"] for document in archive.documents} == {
+        "a": "cancelled", "b": "confirmed",
+    }
+
+
+def test_duplicate_ids_fall_back_to_a_non_unique_index(fake_db):
+    db = fake_db
+    db.bookings.documents = [_booking("a"), _booking("a")]
+    lifecycle = BookingLifecycle(db)
+    asyncio.run(lifecycle.ensure_indexes())
+    assert "id_1" not in db.bookings.indexes
+    assert db.bookings.indexes["id_1__id_1"] == {"unique": False}
+
+    db.bookings.documents.pop()
+    asyncio.run(lifecycle.ensure_indexes())
+    assert db.bookings.indexes["id_1"] == {"unique": True}
+    assert "id_1__id_1" not in db.bookings.indexes
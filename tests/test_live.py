@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from live import (
+    DROPPED, LiveHub, LiveRelay, Subscriber, destination_topic, hotel_topic, parse_subscription, sse_format,
+)
+
+
+def test_subscriber_overflow_drops_and_leaves_only_notice():
+    subscriber = Subscriber(buffer_size=2)
+    assert subscriber.offer({"n": 1})
+    assert subscriber.offer({"n": 2})
+    assert not subscriber.offer({"n": 3})
+    assert subscriber.dropped
+    assert subscriber.queue.qsize() == 1
+    assert subscriber.queue.get_nowait() is DROPPED
+    assert not subscriber.offer({"n": 4})
+
+
+def test_hub_fans_out_and_drops_slow_consumers():
+    async def run():
+        hub = LiveHub(buffer_size=2)
+        fast, slow = hub.connect(), hub.connect()
+        hub.subscribe(fast, [hotel_topic("h1")])
+        hub.subscribe(slow, [hotel_topic("h1")])
+        received = []
+        for n in range(4):
+            hub.publish(hotel_topic("h1"), {"type": "price", "n": n})
+            await asyncio.sleep(0)
+            received.append(await fast.next(timeout=1))
+        await asyncio.sleep(0)
+        return hub, slow, received
+
+    hub, slow, received = asyncio.run(run())
+    assert [message["n"] for message in received] == [0, 1, 2, 3]
+    assert received[0]["topic"] == "hotel:h1"
+    assert slow.dropped
+    assert hub.dropped == 1
+    assert hub.stats()["subscriptions"] == 1
+
+
+def test_unsubscribing_last_listener_removes_topic():
+    async def run():
+        hub = LiveHub()
+        subscriber = hub.connect()
+        hub.subscribe(subscriber, [destination_topic("d1"), hotel_topic("h1")])
+        hub.unsubscribe(subscriber, [hotel_topic("h1")])
+        topics = hub.stats()["topics"]
+        hub.disconnect(subscriber)
+        hub.publish(destination_topic("d1"), {"type": "availability"})
+        return topics, hub.stats()
+
+    topics, stats = asyncio.run(run())
+    assert topics == 1
+    assert stats["topics"] == 0
+    assert stats["connections"] == 0
+    assert stats["published"] == 0
+
+
+def test_relay_delivers_to_every_listed_topic():
+    async def run():
+        hub = LiveHub()
+        relay = LiveRelay(hub)
+        subscriber = hub.connect()
+        hub.subscribe(subscriber, [destination_topic("d1"), hotel_topic("h1")])
+        relay.deliver({"topics": [destination_topic("d1"), hotel_topic("h1")], "event": {"type": "availability"}})
+        return [await subscriber.next(timeout=1), await subscriber.next(timeout=1)], relay.relayed
+
+    messages, relayed = asyncio.run(run())
+    assert sorted(message["topic"] for message in messages) == ["destination:d1", "hotel:h1"]
+    assert relayed == 1
+
+
+def test_sse_format():
+    assert sse_format({"type": "price", "n": 1}) == 'event: price\ndata: {"type": "price", "n": 1}\n\n'
+
+
+def test_subscribe_caps_topics_per_subscriber():
+    async def run():
+        hub = LiveHub(max_topics=2)
+        subscriber = hub.connect()
+        first = hub.subscribe(subscriber, [hotel_topic("h1"), hotel_topic("h1"), hotel_topic("h2")])
+        second = hub.subscribe(subscriber, [hotel_topic("h3")])
+        hub.unsubscribe(subscriber, [hotel_topic("h1")])
+        third = hub.subscribe(subscriber, [hotel_topic("h3")])
+        return subscriber, first, second, third
+
+    subscriber, first, second, third = asyncio.run(run())
+    assert first == []
+    assert second == ["hotel:h3"]
+    assert third == []
+    assert subscriber.topics == {"hotel:h2", "hotel:h3"}
+
+
+def test_parse_subscription_validates_shape():
+    assert parse_subscription({"subscribe": ["hotel:h1"]}) == (["hotel:h1"], [])
+    assert parse_subscription({"unsubscribe": ["hotel:h1"]}) == ([], ["hotel:h1"])
+    for message in ([1, 2], "hotel:h1", None, {"subscribe": "hotel:h1"}, {"subscribe": [1]},
+                    {"unsubscribe": [""]}, {"subscribe": ["x" * 1000]}):
+        with pytest.raises(ValueError):
+            parse_subscription(message)
@@ -0,0 +1,25 @@
+import pytest
+
+from pricing import PRICE_TIER_MAX, price_filters, price_tier
+
+
+@pytest.mark.parametrize("price_range, tier", [
+    ("$", 1), ("$$$", 3), (" €€ ", 2), ("£££££", PRICE_TIER_MAX), ("2", 2), (3, 3), ("9", PRICE_TIER_MAX),
+])
+def test_price_tier_parses_symbols_and_numbers(price_range, tier):
+    assert price_tier(price_range) == tier
+
+
+@pytest.mark.parametrize("price_range", [None, "", "0", "cheap", "²", "-1", "1.5"])
+def test_price_tier_rejects_unparseable_values(price_range):
+    assert price_tier(price_range) is None
+
+
+def test_price_filters_combine_bounds():
+    assert price_filters() == {}
+    assert price_filters(min_tier=2) == {"price_tier": {"$gte": 2}}
+    assert price_filters(min_tier=1, max_tier=3, max_from_price=0) == {
+        "price_tier": {"$gte": 1, "$lte": 3},
+        "from_price": {"$lte": 0},
+    }
+    assert price_filters(min_from_price=50.0, max_from_price=200.0) == {"from_price": {"$gte": 50.0, "$lte": 200.0}}
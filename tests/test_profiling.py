@@ -0,0 +1,30 @@
+import os
+from collections import Counter
+
+from profiling import ProfilingMiddleware, ProfileStore
+
+
+def _scope(token: bytes, flagged: bool = True):
+    headers = [(b"x-admin-token", token)] + ([(b"x-profile", b"1")] if flagged else [])
+    return {"type": "http", "headers": headers, "query_string": b""}
+
+
+def test_profiling_requires_matching_admin_token(tmp_path):
+    middleware = ProfilingMiddleware(None, ProfileStore(str(tmp_path)), admin_token="s3cret")
+    assert middleware._requested(_scope(b"s3cret"))
+    assert not middleware._requested(_scope(b"s3cret", flagged=False))
+    assert not middleware._requested(_scope(b"wrong"))
+    assert not middleware._requested(_scope("é".encode()))
+    assert not middleware._requested(_scope("s3cret".encode("utf-16")))
+
+
+def test_store_keeps_only_newest_profiles(tmp_path):
+    store = ProfileStore(str(tmp_path), max_profiles=3)
+    for n in range(5):
+        store.write(f"20260101-00000{n}-GET-api", Counter({"handler (server.py:1)": n + 1}))
+        path = tmp_path / f"20260101-00000{n}-GET-api.collapsed"
+        os.utime(path, ns=(n * 10**9, n * 10**9))
+        store.prune()
+    assert store.list() == ["20260101-000004-GET-api", "20260101-000003-GET-api", "20260101-000002-GET-api"]
+    assert store.read("20260101-000004-GET-api") == "handler (server.py:1) 5\n"
+    assert store.read("20260101-000000-GET-api") is None
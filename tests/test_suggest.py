@@ -0,0 +1,118 @@
+import asyncio
+
+import datagen
+from suggest import PrefixIndex, fold
+
+
+def _destination(destination_id, name, rating, country="France", activities=()):
+    return {
+        "id": destination_id, "name": name, "country": country, "type": "city",
+        "rating": rating, "popular_activities": list(activities),
+    }
+
+
+def _brute_force(destinations, prefix, limit):
+    prefix = fold(prefix)
+    matching = [
+        destination for destination in destinations
+        if any(term.startswith(prefix) for term in
+               [fold(destination["name"]), fold(destination["country"])]
+               + fold(destination["name"]).split()
+               + [fold(activity) for activity in destination["popular_activities"]])
+    ]
+    matching.sort(key=lambda destination: (destination["rating"], destination["id"]), reverse=True)
+    return [destination["id"] for destination in matching[:limit]]
+
+
+def test_fold_ignores_case_and_accents():
+    assert fold("  Zürich Élysée ") == "zurich elysee"
+
+
+def test_suggest_matches_any_term_ranked_by_rating():
+    index = PrefixIndex()
+    index.rebuild([
+        _destination("a", "Paris", 4.5),
+        _destination("b", "Porto", 4.7, country="Portugal"),
+        _destination("c", "Nice", 4.1, activities=["Paragliding"]),
+        _destination("d", "São Paulo", 4.9, country="Brazil"),
+    ])
+    assert [entry["id"] for entry in index.suggest("P")] == ["d", "b", "a", "c"]
+    assert [entry["id"] for entry in index.suggest("par", limit=1)] == ["a"]
+    assert [entry["id"] for entry in index.suggest("sao p")] == ["d"]
+    assert index.suggest("  ") == []
+    assert index.suggest("xyz") == []
+
+
+def test_short_and_long_prefixes_match_a_full_scan():
+    destinations = list(datagen.generate_destinations(500, seed=5))
+    index = PrefixIndex(short_prefix=2, max_limit=10)
+    index.rebuild(destinations)
+    for query in ("k", "ka", "kal", "kalo", "s", "sur", "fr", "hik", "zz"):
+        for limit in (3, 10, 15):
+            assert [entry["id"] for entry in index.suggest(query, limit)] == \
+                _brute_force(destinations, query, limit), (query, limit)
+
+
+def test_add_and_remove_keep_precomputed_answers_current():
+    destinations = list(datagen.generate_destinations(300, seed=9))
+    index = PrefixIndex(max_limit=5)
+    index.rebuild(destinations)
+    index.suggest("kalo")
+    top = index.suggest("k")[0]
+
+    # Demoting the best match refills the precomputed answer from the rest
+    demoted = dict(next(d for d in destinations if d["id"] == top["id"]), rating=1.0)
+    index.add(demoted)
+    destinations = [demoted if d["id"] == demoted["id"] else d for d in destinations]
+    added = _destination("new", "Kalopolis", 5.0)
+    index.add(added)
+    destinations.append(added)
+    for query in ("k", "ka", "kal", "kalo", "kalop"):
+        assert [entry["id"] for entry in index.suggest(query, 5)] == _brute_force(destinations, query, 5)
+
+    index.remove("new")
+    destinations.pop()
+    for query in ("k", "kalo"):
+        assert [entry["id"] for entry in index.suggest(query, 5)] == _brute_force(destinations, query, 5)
+    assert len(index) == 300
+
+
+def test_query_cache_evicts_least_recently_used():
+    index = PrefixIndex(max_cached_queries=2, short_prefix=1)
+    index.rebuild([_destination("a", "Kalo", 4.0), _destination("b", "Karo", 4.5)])
+    index.suggest("ka")
+    index.suggest("kal")
+    index.suggest("ka")
+    index.suggest("kar")
+    assert list(index._cache) == [("ka", 8), ("kar", 8)]
+
+
+def test_reload_keeps_additions_and_reruns_for_invalidations_during_the_load(fake_db):
+    fake_db.destinations.documents = [_destination("a", "Paris", 4.5)]
+
+    async def run():
+        index = PrefixIndex()
+        gate = asyncio.Event()
+        reads = []
+
+        async def before_read():
+            reads.append(len(reads))
+            if len(reads) == 1:
+                await gate.wait()
+
+        fake_db.destinations.before_read = before_read
+        index.apply_change(fake_db, None)
+        await asyncio.sleep(0)
+        # Added after the first load's snapshot, then another invalidation
+        fake_db.destinations.documents.append(_destination("b", "Porto", 4.7))
+        index.apply_change(fake_db, _destination("b", "Porto", 4.7))
+        fake_db.destinations.documents.append(_destination("c", "Pisa", 4.0))
+        index.apply_change(fake_db, None)
+        gate.set()
+        await index._reload
+        return index, reads
+
+    index, reads = asyncio.run(run())
+    assert len(reads) == 2
+    assert [entry["id"] for entry in index.suggest("p")] == ["b", "a", "c"]
+    assert index._pending is None